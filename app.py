@@ -1,14 +1,28 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from io import StringIO
-import google.generativeai as genai
-import os
 from datetime import datetime
-import plotly.express as px
-import plotly.graph_objects as go
+
+# Plotly and the Gemini client are imported on first use, not at startup
+from performance_tracker import engine
+from performance_tracker.ai import DEFAULT_MODEL, configure as configure_gemini, generate_insight, stream_insight
+from performance_tracker.ai_cache import ResponseCache, prompt_key
+from performance_tracker.charts import histogram_figure, history_figure, line_figure, radar_figure
+from performance_tracker.config import METRICS_FILE, METRICS_PORT
+from performance_tracker.dataset_cache import DatasetCache
+from performance_tracker.export import FORMATS as EXPORT_FORMATS, ExportCache, insights_markdown
+from performance_tracker.history import find_time_column
+from performance_tracker.ingestion import format_bytes
+from performance_tracker.instrumentation import (
+    cache_hit_rates,
+    histogram_summary,
+    stage,
+    start_metrics_server,
+    trace,
+    write_metrics_file,
+)
+from performance_tracker.jobs import DONE, FAILED, JobManager, job_id_for
+from performance_tracker.prompts import DEFAULT_EMPLOYEES_PER_REQUEST
+from performance_tracker.tables import metric_ranges, page_count, render_colored_table
 
 # Set page configuration
 st.set_page_config(
@@ -70,9 +84,10 @@ def initialize_gemini():
             # If secrets file doesn't exist, use the default API key
             api_key = default_api_key
     
-    # Configure Gemini with the API key
+    # Configure Gemini with the API key; the client itself is imported and
+    # configured once per process, on the first AI request
     try:
-        genai.configure(api_key=api_key)
+        configure_gemini(api_key)
         st.session_state.api_key = api_key
         return True
     except Exception as e:
@@ -81,90 +96,259 @@ def initialize_gemini():
         new_api_key = st.text_input("Enter your Gemini API Key:", type="password")
         if st.button("Save API Key"):
             st.session_state.api_key = new_api_key
-            genai.configure(api_key=new_api_key)
+            configure_gemini(new_api_key)
             st.success("API Key saved successfully!")
             return True
         return False
 
+# Function to get the Gemini response cache
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache()
+
 # Function to get AI insights
-def get_ai_insights(employee_data, prompt):
+def get_ai_insights(employee_data, prompt, stream=False):
+    """
+    Return Gemini's answer to the prompt; with stream=True it is also rendered as it arrives.
+    On failure the error is shown and None is returned.
+    """
     try:
-        model = genai.GenerativeModel('gemini-pro')
-        response = model.generate_content(prompt)
-        return response.text
+        # Identical prompts are answered from the cache instead of calling Gemini again
+        if stream:
+            return st.write_stream(stream_insight(prompt, cache=get_response_cache()))
+        return generate_insight(prompt, cache=get_response_cache())
     except Exception as e:
         st.error(f"Error getting AI insights: {e}")
-        return "Unable to generate insights at this time."
+        return None
 
-# Function to extract performance metrics
-def extract_performance_metrics(df):
+# Function to get the runner for background AI generations
+@st.cache_resource
+def get_job_manager():
+    return JobManager()
+
+# Function to show an on-demand AI generation
+def show_ai_job(job_name, prompt, button_label):
     """
-    Dynamically extract key performance metrics from the dataframe
+    Offer a button that generates the prompt in the background, then show its status and result
     """
-    metrics = {}
-    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    cache = get_response_cache()
     
-    # Try to identify key metrics based on column names
-    possible_metrics = {
-        'performance': ['performance', 'score', 'rating', 'evaluation', 'assessment', 'review'],
-        'targets': ['target', 'goal', 'objective', 'quota'],
-        'sales': ['sales', 'revenue', 'deals', 'conversion'],
-        'attendance': ['attendance', 'presence', 'absence', 'leave'],
-        'productivity': ['productivity', 'output', 'efficiency', 'tasks', 'completed'],
-        'quality': ['quality', 'errors', 'accuracy', 'defects', 'precision']
-    }
+    # Answers that are already cached need no job at all
+    cached = cache.get(prompt_key(DEFAULT_MODEL, prompt))
+    if cached is not None:
+        st.markdown(cached)
+        return
     
-    for metric_type, keywords in possible_metrics.items():
-        for col in df.columns:
-            col_lower = col.lower()
-            if any(keyword in col_lower for keyword in keywords) and col in numeric_cols:
-                metrics[metric_type] = col
-                break
+    manager = get_job_manager()
+    job_id = job_id_for(job_name, prompt)
+    jobs = st.session_state.setdefault('ai_jobs', {})
+    job = manager.get(job_id) if jobs.get(job_name) == job_id else None
     
-    # If no specific metrics found, use available numeric columns
-    if not metrics and numeric_cols:
-        for i, col in enumerate(numeric_cols[:min(6, len(numeric_cols))]):
-            metric_types = list(possible_metrics.keys())
-            if i < len(metric_types):
-                metrics[metric_types[i]] = col
-            else:
-                metrics[f'metric_{i+1}'] = col
+    if job is not None and job.status == DONE:
+        st.markdown(job.result)
+        return
     
-    return metrics
+    if job is None or job.status == FAILED:
+        if job is not None:
+            st.error(f"Error getting AI insights: {job.error}")
+        if not st.button(button_label, key=f"{job_name}_request"):
+            return
+        # Streamed, so the fragment below can show the answer as it arrives
+        manager.submit(job_id, stream_insight, prompt, cache=cache, label=button_label)
+        jobs[job_name] = job_id
+    
+    show_ai_job_status(job_id)
 
-# Function to analyze employee data
-def analyze_employee_data(df, employee_id, metrics):
+# Poll a running AI job without rerunning the rest of the page
+@st.fragment(run_every=2)
+def show_ai_job_status(job_id):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return
+    if job.finished:
+        # Rerun the page once so it renders the outcome and this fragment stops polling
+        st.rerun(scope="app")
+    if job.partial:
+        st.markdown(job.partial)
+    st.info(f"⏳ {job.label}: {job.status} ({job.elapsed:.0f}s)")
+
+# Function to get the cache of cleaned uploads
+@st.cache_resource
+def get_dataset_cache():
+    return DatasetCache()
+
+# Function to get the distribution chart for a metric, built once per dataset
+def get_histogram_figure(dataset, col_name):
+    return dataset.cached(
+        ('histogram', col_name),
+        lambda: histogram_figure(dataset.df[col_name],
+                                 title=f"Distribution of {col_name.replace('_', ' ').title()}")
+    )
+
+# Function to show the team table one page at a time
+def show_team_table(table, key):
     """
-    Analyze individual employee data and generate insights
+    Render search, filter, sort and paging controls, then only the current page of rows
     """
-    employee_data = df[df['employee_id'] == employee_id].to_dict('records')[0]
-    
-    # Prepare data for AI analysis
-    metric_details = []
-    for metric_type, col_name in metrics.items():
-        if col_name in employee_data:
-            metric_details.append(f"{metric_type.capitalize()}: {employee_data[col_name]}")
+    df = table.df
+    no_sort = "(original order)"
+    search_cols = [col for col in ('employee_id', 'name') if col in df.columns]
+    filter_col = 'department' if 'department' in df.columns else None
     
-    # Create a prompt for Gemini
-    prompt = f"""
-    Analyze this employee's performance data and provide concise, actionable insights and improvement suggestions:
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        search = st.text_input("Search by ID or name:", key=f"{key}_search") if search_cols else ""
+        selected_values = st.multiselect("Department:", table.distinct_values(filter_col),
+                                         key=f"{key}_filter") if filter_col else []
+    with col2:
+        sort_by = st.selectbox("Sort by:", [no_sort] + list(df.columns), key=f"{key}_sort")
+        descending = st.checkbox("Descending", value=True, key=f"{key}_descending")
+    with col3:
+        page_size = st.selectbox("Rows per page:", [25, 50, 100, 250], index=1, key=f"{key}_page_size")
     
-    Employee ID: {employee_id}
-    {', '.join([f"{k}: {employee_data.get(k, 'N/A')}" for k in employee_data if k != 'employee_id'])}
+    mask = None
+    if search or selected_values:
+        filters = {filter_col: selected_values} if filter_col else {}
+        mask = table.filter_mask(filters, search, search_cols)
+    positions = table.query(None if sort_by == no_sort else sort_by, not descending, mask)
     
-    Key metrics:
-    {', '.join(metric_details)}
+    # Keep the page in range when filters shrink the result
+    pages = page_count(len(positions), page_size)
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    with col3:
+        page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
     
-    Please provide:
-    1. A brief assessment of their performance (2-3 sentences)
-    2. 3 specific strengths based on the data
-    3. 2-3 improvement areas with actionable suggestions
-    4. A performance rating on a scale of 1-10
+    st.dataframe(table.page(positions, page, page_size), use_container_width=True)
+    start = (page - 1) * page_size
+    st.caption(f"Showing rows {min(start + 1, len(positions))}–{min(start + page_size, len(positions))} "
+               f"of {len(positions):,}" + (f" (filtered from {len(df):,})" if mask is not None else ""))
+
+# Function to show rollups by department, manager and role with drill-down
+def show_team_breakdown(cube):
+    """
+    Drill from departments down through managers to roles, served from the precomputed rollups
     """
+    all_values = "(all)"
+    path = []
+    selectors = len(cube.levels) - 1 + (1 if cube.has_periods else 0)
+    columns = st.columns(selectors) if selectors else []
+    
+    period = None
+    if cube.has_periods:
+        periods = cube.periods()
+        with columns[-1]:
+            choice = st.selectbox("Period:", [all_values] + periods, key="breakdown_period",
+                                  format_func=lambda value: value if value == all_values else f"{value:%Y-%m}")
+        period = None if choice == all_values else choice
+    
+    # One selector per level; each choice narrows the next level's options
+    for i, level in enumerate(cube.levels[:-1]):
+        options = list(cube.drill(path, period).index)
+        with columns[i]:
+            choice = st.selectbox(f"{level.replace('_', ' ').title()}:", [all_values] + options,
+                                  key="breakdown_" + "/".join(map(str, path + [level])))
+        if choice == all_values:
+            break
+        path.append(choice)
+    
+    table = cube.drill(path, period)
+    level = cube.levels[len(path)]
+    display = table[cube.summary_columns()].rename(columns=lambda col: col.replace('_', ' ').title())
+    column_config = {col: st.column_config.NumberColumn(format="%.2f")
+                     for col in display.columns if col.endswith(' Mean')}
+    for name in cube.attainment:
+        column_config[name.replace('_', ' ').title()] = st.column_config.NumberColumn(format="percent")
+    st.dataframe(display, use_container_width=True, column_config=column_config)
+    st.caption(f"{len(table):,} {level.replace('_', ' ')} group(s)"
+               + (" in " + " › ".join(map(str, path)) if path else ""))
     
-    analysis = get_ai_insights(employee_data, prompt)
+    # A selected manager's whole reporting line, including indirect reports
+    if 'manager_id' in cube.levels and len(path) > cube.levels.index('manager_id'):
+        manager_id = path[cube.levels.index('manager_id')]
+        chain = cube.chain(manager_id)
+        line = cube.manager_rollup(manager_id)
+        if chain:
+            st.caption("Reporting chain: " + " → ".join(map(str, [manager_id] + chain)))
+        if line is not None and line['employees'] > len(cube.direct_reports(manager_id)):
+            st.caption(f"Reporting line of {manager_id}: {int(line['employees']):,} employees, "
+                       f"{int(line['records']):,} records")
+
+# Function to collect the AI insights generated for a dataset, for export
+def collect_insights(dataset):
+    """
+    Return the team-level insights and per-employee analyses available for this dataset
+    """
+    insights = engine.cached_team_reports(dataset, get_response_cache())
+    for question, text in st.session_state.get('custom_insights', {}).get(dataset.key, {}).items():
+        insights[f"Q: {question}"] = text
+    employee_analyses = dict(st.session_state.get('employee_analyses', {}).get(dataset.key, {}))
+    employee_analyses.update(st.session_state.get('batch_results', {}).get(dataset.key, {}))
+    return insights, employee_analyses
+
+# Function to get the cache of generated export files
+@st.cache_resource
+def get_export_cache():
+    return ExportCache()
+
+# Function to analyze employee data
+def analyze_employee_data(dataset, employee_id, stream=False):
+    """
+    Analyze individual employee data and generate insights
+    """
+    prompt = engine.build_employee_prompt(dataset, employee_id)
+    analysis = get_ai_insights(dataset.df, prompt, stream=stream)
     return analysis
 
+# Function to start the metrics endpoint once per server process
+@st.cache_resource
+def get_metrics_server():
+    try:
+        return start_metrics_server(METRICS_PORT)
+    except OSError as e:
+        # Another server process may already own the port
+        st.warning(f"Metrics endpoint unavailable on port {METRICS_PORT}: {e}")
+        return None
+
+# Function to show where the last rerun spent its time
+def show_diagnostics(rerun):
+    """
+    Optional sidebar panel with per-stage timings, Gemini latency and token sizes, and cache hit rates
+    """
+    if not st.sidebar.checkbox("Show performance diagnostics", key="show_diagnostics"):
+        return
+    
+    with st.sidebar:
+        st.markdown("### Performance Diagnostics")
+        caption = f"Last rerun: {rerun.seconds * 1000:,.0f} ms"
+        if rerun.memory_bytes is not None:
+            caption += f" · {format_bytes(rerun.memory_bytes)} resident"
+        st.caption(caption)
+        if rerun.stages:
+            st.dataframe(pd.DataFrame([
+                {'Stage': name, 'Time (ms)': round(seconds * 1000, 1),
+                 'Memory Δ (MB)': round(delta / 1024 ** 2, 1) if delta is not None else None}
+                for name, seconds, delta in rerun.stages
+            ]), hide_index=True, use_container_width=True)
+        
+        st.markdown("**Gemini**")
+        calls, latency = histogram_summary('gemini_request_seconds')
+        if calls:
+            _, prompt_tokens = histogram_summary('gemini_prompt_tokens')
+            _, response_tokens = histogram_summary('gemini_response_tokens')
+            st.caption(f"{calls} calls · {latency:.2f} s average · "
+                       f"~{prompt_tokens:,.0f} prompt / ~{response_tokens:,.0f} response tokens on average")
+        else:
+            st.caption("No calls in this server process yet.")
+        
+        rates = cache_hit_rates()
+        if rates:
+            st.markdown("**Caches**")
+            st.dataframe(pd.DataFrame([
+                {'Cache': cache, 'Lookups': lookups, 'Hit rate': f"{rate:.0%}"}
+                for cache, (lookups, rate) in sorted(rates.items())
+            ]), hide_index=True, use_container_width=True)
+
 # Main app function
 def main():
     st.markdown('<p class="main-header">Performance Tracker Prototype</p>', unsafe_allow_html=True)
@@ -176,30 +360,18 @@ def main():
     uploaded_file = st.file_uploader("Upload your employee performance data (CSV)", type="csv")
     
     if uploaded_file is not None:
-        # Load and display data
-        df = pd.read_csv(uploaded_file)
-        
-        # Save original dataframe
-        if 'original_df' not in st.session_state:
-            st.session_state.original_df = df.copy()
-        
-        # Basic data cleaning
-        # Convert column names to lowercase and replace spaces with underscores
-        df.columns = [col.lower().replace(' ', '_') for col in df.columns]
-        
-        # Try to identify employee ID column
-        employee_id_col = None
-        for col in df.columns:
-            if 'id' in col.lower() or 'employee' in col.lower():
-                employee_id_col = col
-                break
+        # Load data, reusing the parsed frame when this exact file was seen before
+        with stage('load'):
+            dataset = engine.load_dataset(uploaded_file.getvalue(), get_dataset_cache())
+            df = dataset.df
+            employee_id_col = dataset.employee_id_col
+            metrics = dataset.metrics
+            summary = engine.summary_stats(dataset)
         
-        if not employee_id_col and len(df.columns) > 0:
-            employee_id_col = df.columns[0]  # Use first column as fallback
-        
-        if employee_id_col:
-            df.rename(columns={employee_id_col: 'employee_id'}, inplace=True)
-            employee_id_col = 'employee_id'
+        memory = dataset.schema.get('memory')
+        if memory:
+            st.caption(f"{memory['rows']:,} rows × {memory['columns']} columns · "
+                       f"{format_bytes(memory['memory_bytes'])} in memory")
         
         # Tabs for different views
         tab1, tab2, tab3 = st.tabs(["📊 Dashboard", "👤 Individual Analysis", "🔍 AI Insights"])
@@ -209,32 +381,20 @@ def main():
             
             col1, col2 = st.columns(2)
             
-            # Extract metrics
-            metrics = extract_performance_metrics(df)
-            
-            with col1:
+            with col1, stage('summary_table'):
                 # Summary statistics
                 st.markdown("### Key Metrics")
-                metrics_df = pd.DataFrame()
-                
-                for metric_type, col_name in metrics.items():
-                    if col_name in df.columns:
-                        metrics_df[metric_type.capitalize()] = [
-                            f"Avg: {df[col_name].mean():.2f}",
-                            f"Min: {df[col_name].min():.2f}",
-                            f"Max: {df[col_name].max():.2f}"
-                        ]
-                
+                metrics_df = summary.metrics_table(metrics)
                 st.dataframe(metrics_df.T)
             
-            with col2:
+            with col2, stage('histogram'):
                 # Distribution plot for a key metric
                 st.markdown("### Performance Distribution")
                 if metrics:
                     main_metric = next(iter(metrics.values()))
                     if main_metric in df.columns:
-                        fig = px.histogram(df, x=main_metric, nbins=10, 
-                                           title=f"Distribution of {main_metric.replace('_', ' ').title()}")
+                        # Binned on the server; only bin edges and counts reach the browser
+                        fig = get_histogram_figure(dataset, main_metric)
                         st.plotly_chart(fig, use_container_width=True)
             
             # Team performance table
@@ -250,191 +410,180 @@ def main():
                 horizontal=True
             )
             
-            if display_option == "Simple Table":
-                # Simple display without styling
-                st.dataframe(df, use_container_width=True)
+            with stage('team_table'):
+                team_table = engine.team_table(dataset)
                 
-            elif display_option == "Highlight Top Performers":
-                # Let user select which metric to highlight
-                if valid_metric_cols:
-                    metric_to_highlight = st.selectbox(
-                        "Select metric to highlight top performers:",
-                        valid_metric_cols
-                    )
-                    
-                    # Number of top performers to show
-                    top_n = st.slider("Number of top performers to highlight:", 1, 10, 5)
+                if display_option == "Simple Table":
+                    # Simple display without styling, one page at a time
+                    show_team_table(team_table, 'simple_table')
                     
-                    # Display top performers
-                    top_performers = df.sort_values(by=metric_to_highlight, ascending=False).head(top_n)
-                    st.subheader(f"Top {top_n} Performers by {metric_to_highlight}")
-                    st.dataframe(top_performers, use_container_width=True)
-                    
-                    # Display all data
-                    st.subheader("All Team Data")
-                    st.dataframe(df, use_container_width=True)
-                else:
-                    st.error("No valid metric columns found for highlighting top performers.")
-                    st.dataframe(df, use_container_width=True)
-                
-            elif display_option == "Color-Coded Table":
-                # Create a custom colored table using HTML
-                if valid_metric_cols:
-                    # Function to create custom HTML table with color coding
-                    def create_colored_table(dataframe, metrics_cols):
-                        # Start HTML table
-                        html = "<table style='width:100%; border-collapse: collapse;'>"
+                elif display_option == "Highlight Top Performers":
+                    # Let user select which metric to highlight
+                    if valid_metric_cols:
+                        metric_to_highlight = st.selectbox(
+                            "Select metric to highlight top performers:",
+                            valid_metric_cols
+                        )
                         
-                        # Header row
-                        html += "<tr>"
-                        for col in dataframe.columns:
-                            html += f"<th style='text-align: left; padding: 8px; background-color: #f1f1f1; border: 1px solid #ddd;'>{col}</th>"
-                        html += "</tr>"
+                        # Number of top performers to show
+                        top_n = st.slider("Number of top performers to highlight:", 1, 10, 5)
                         
-                        # Data rows
-                        for idx, row in dataframe.iterrows():
-                            html += "<tr>"
-                            for col in dataframe.columns:
-                                cell_value = row[col]
-                                cell_style = "border: 1px solid #ddd; padding: 8px;"
-                                
-                                # Apply color styling to metric columns
-                                if col in metrics_cols and pd.api.types.is_numeric_dtype(dataframe[col]):
-                                    min_val = dataframe[col].min()
-                                    max_val = dataframe[col].max()
-                                    
-                                    # Avoid division by zero
-                                    if max_val > min_val:
-                                        try:
-                                            ratio = (cell_value - min_val) / (max_val - min_val)
-                                            
-                                            # Generate color (green for high values)
-                                            intensity = int(255 * ratio)
-                                            cell_style += f"background-color: rgba(0, {intensity}, 0, 0.2);"
-                                            
-                                            # Make high values bold
-                                            if ratio > 0.8:
-                                                cell_style += "font-weight: bold;"
-                                        except:
-                                            # Handle any calculation errors
-                                            pass
-                                
-                                html += f"<td style='{cell_style}'>{cell_value}</td>"
-                            html += "</tr>"
+                        # Display top performers (partial selection, no full sort)
+                        top_performers = team_table.top_n(metric_to_highlight, top_n)
+                        st.subheader(f"Top {top_n} Performers by {metric_to_highlight}")
+                        st.dataframe(top_performers, use_container_width=True)
                         
-                        html += "</table>"
-                        return html
-                    
-                    # Create and display the colored table
-                    colored_table = create_colored_table(df, valid_metric_cols)
-                    st.markdown(colored_table, unsafe_allow_html=True)
+                        # Display all data
+                        st.subheader("All Team Data")
+                        show_team_table(team_table, 'all_team_data')
+                    else:
+                        st.error("No valid metric columns found for highlighting top performers.")
+                        show_team_table(team_table, 'all_team_data')
                     
-                    # Show which metrics are color-coded
-                    st.caption(f"Color intensity indicates relative performance across: {', '.join(valid_metric_cols)}")
-                else:
-                    st.error("No valid metric columns found for color coding.")
-                    st.dataframe(df, use_container_width=True)
+                elif display_option == "Color-Coded Table":
+                    # Create a custom colored table using HTML, one page at a time
+                    if valid_metric_cols:
+                        page_size = st.selectbox("Rows per page:", [25, 50, 100, 250], index=1)
+                        pages = page_count(len(df), page_size)
+                        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+                        start = (page - 1) * page_size
+                        stop = min(start + page_size, len(df))
+                        
+                        # Color ranges span the whole team, not just the visible page
+                        ranges = dataset.cached(
+                            ('metric_ranges', tuple(valid_metric_cols)),
+                            lambda: metric_ranges(df, valid_metric_cols)
+                        )
+                        colored_table = render_colored_table(df, valid_metric_cols, start, stop, ranges)
+                        st.markdown(colored_table, unsafe_allow_html=True)
+                        st.caption(f"Showing rows {start + 1}–{stop} of {len(df)}")
+                        
+                        # Show which metrics are color-coded
+                        st.caption(f"Color intensity indicates relative performance across: {', '.join(valid_metric_cols)}")
+                    else:
+                        st.error("No valid metric columns found for color coding.")
+                        show_team_table(team_table, 'simple_table')
+            
+            # Department, manager and role rollups, aggregated once per dataset
+            with stage('team_breakdown'):
+                cube = engine.rollup_cube(dataset)
+                if cube.levels:
+                    st.markdown("### Team Breakdown")
+                    show_team_breakdown(cube)
             
             # Generate team insights using AI if API is initialized
             if api_initialized:
-                with st.expander("🧠 Team Performance Insights"):
-                    team_prompt = f"""
-                    Analyze this team's performance data and provide concise, actionable insights:
-                    
-                    Team size: {len(df)}
-                    Key metrics: {', '.join([f"{k.capitalize()}: Avg={df[v].mean():.2f}, Min={df[v].min():.2f}, Max={df[v].max():.2f}" for k, v in metrics.items() if v in df.columns])}
-                    
-                    Please provide:
-                    1. A brief assessment of team performance (3-4 sentences)
-                    2. Top performance trends 
-                    3. 2-3 team improvement suggestions
-                    """
+                with st.expander("🧠 Team Performance Insights"), stage('team_insights'):
+                    team_prompt = engine.build_team_prompt(dataset)
                     
-                    with st.spinner("Generating team insights..."):
-                        team_insights = get_ai_insights(df, team_prompt)
-                        st.markdown(team_insights)
+                    # Generated in the background only when requested
+                    show_ai_job('team_insights', team_prompt, "Generate team insights")
         
         with tab2:
             st.markdown('<p class="sub-header">Individual Employee Analysis</p>', unsafe_allow_html=True)
             
             # Employee selector
             if employee_id_col and employee_id_col in df.columns:
-                employee_ids = df[employee_id_col].unique().tolist()
+                employee_index = engine.employee_index(dataset)
+                employee_ids = employee_index.ids
+                
+                # Batch results are kept per dataset so a new upload starts fresh
+                batch_results = st.session_state.setdefault('batch_results', {}).setdefault(dataset.key, {})
+                
+                if api_initialized:
+                    with st.expander("⚡ Batch analysis for all employees"), stage('batch_analysis'):
+                        batch_col1, batch_col2, batch_col3 = st.columns(3)
+                        with batch_col1:
+                            concurrency = st.slider("Concurrent requests:", 1, 16, 4)
+                        with batch_col2:
+                            rate_per_minute = st.number_input("Max requests per minute:", min_value=1, value=60, step=10)
+                        with batch_col3:
+                            # Several employees share one request, cutting calls for large teams
+                            per_request = st.slider("Employees per request:", 1, 16, DEFAULT_EMPLOYEES_PER_REQUEST)
+                        
+                        if st.button(f"Analyze all {len(employee_ids)} employees"):
+                            progress = st.progress(0.0, text="Starting batch analysis...")
+                            finished = st.container()
+                            completed = []
+                            
+                            for result in engine.analyze_all_employees(dataset, employee_ids, concurrency,
+                                                                       rate_per_minute, cache=get_response_cache(),
+                                                                       per_request=per_request):
+                                completed.append(result)
+                                progress.progress(len(completed) / len(employee_ids),
+                                                  text=f"Analyzed {len(completed)} of {len(employee_ids)} employees")
+                                if result.ok:
+                                    batch_results[result.item] = result.value
+                                    with finished.expander(f"✅ {result.item}"):
+                                        st.markdown(result.value)
+                                else:
+                                    finished.error(f"{result.item}: {result.error}")
+                            retryable = sum(result.retryable for result in completed)
+                            if retryable:
+                                st.warning(f"{retryable} analyses failed after retries; run the batch again to retry them.")
+                            rejected = sum(not result.ok and not result.retryable for result in completed)
+                            if rejected:
+                                st.warning(f"{rejected} analyses were rejected (for example an invalid API key or a "
+                                           "blocked prompt); fix the errors above before running the batch again.")
+                        elif batch_results:
+                            st.caption(f"{len(batch_results)} of {len(employee_ids)} employees analyzed in this session.")
+                
                 selected_employee = st.selectbox("Select Employee", employee_ids)
                 
-                if selected_employee:
-                    employee_data = df[df[employee_id_col] == selected_employee]
-                    
+                if selected_employee is not None and selected_employee in employee_index:
                     # Display employee information
                     col1, col2 = st.columns([2, 3])
                     
-                    with col1:
+                    with col1, stage('employee_details'):
                         st.markdown("### Employee Details")
-                        details_to_show = {}
                         non_metric_cols = [col for col in df.columns if col not in metrics.values() and col != employee_id_col]
-                        for col in non_metric_cols[:5]:  # Show first 5 non-metric columns
-                            details_to_show[col.replace('_', ' ').title()] = employee_data[col].iloc[0]
+                        # Show first 5 non-metric columns
+                        details = employee_index.details(selected_employee, non_metric_cols[:5])
+                        details_to_show = {col.replace('_', ' ').title(): value for col, value in details.items()}
                         
                         for k, v in details_to_show.items():
                             st.markdown(f"**{k}:** {v}")
                     
-                    with col2:
+                    with col2, stage('radar_chart'):
                         st.markdown("### Performance Metrics")
                         
-                        # Create radar chart for performance metrics
-                        performance_metrics = {}
-                        for metric_type, col_name in metrics.items():
-                            if col_name in employee_data.columns:
-                                performance_metrics[metric_type.capitalize()] = float(employee_data[col_name].iloc[0])
+                        # Create radar chart from the precomputed, team-normalized metrics
+                        normalized_metrics = employee_index.normalized_metrics(selected_employee)
                         
-                        if performance_metrics:
-                            categories = list(performance_metrics.keys())
-                            values = list(performance_metrics.values())
-                            
-                            # Normalize values for radar chart
-                            max_values = {metric: df[col].max() for metric, col in metrics.items()}
-                            normalized_values = [values[i] / max_values[categories[i].lower()] for i in range(len(values))]
-                            
-                            # Add the first value at the end to close the radar chart
-                            categories.append(categories[0])
-                            normalized_values.append(normalized_values[0])
-                            
-                            fig = go.Figure()
-                            fig.add_trace(go.Scatterpolar(
-                                r=normalized_values,
-                                theta=categories,
-                                fill='toself',
-                                name='Performance'
-                            ))
-                            
-                            fig.update_layout(
-                                polar=dict(
-                                    radialaxis=dict(
-                                        visible=True,
-                                        range=[0, 1]
-                                    )
-                                ),
-                                showlegend=False
-                            )
-                            
+                        if normalized_metrics:
+                            fig = radar_figure({metric_type.capitalize(): value
+                                                for metric_type, value in normalized_metrics.items()})
                             st.plotly_chart(fig, use_container_width=True)
                     
                     # AI-generated insights for the employee
-                    if api_initialized:
-                        st.markdown("### AI-Powered Performance Analysis")
-                        with st.spinner("Analyzing employee data..."):
-                            analysis = analyze_employee_data(df, selected_employee, metrics)
-                            st.markdown(analysis)
+                    with stage('employee_analysis'):
+                        if api_initialized:
+                            st.markdown("### AI-Powered Performance Analysis")
+                            if selected_employee in batch_results:
+                                st.caption("From batch analysis")
+                                st.markdown(batch_results[selected_employee])
+                            else:
+                                analysis = analyze_employee_data(dataset, selected_employee, stream=True)
+                                # Kept for export alongside the batch results
+                                if analysis is not None:
+                                    st.session_state.setdefault('employee_analyses', {}).setdefault(
+                                        dataset.key, {})[selected_employee] = analysis
                 
                 # Historical comparison if available
-                if 'date' in df.columns or 'period' in df.columns or 'month' in df.columns or 'quarter' in df.columns:
-                    time_col = next((col for col in df.columns if col in ['date', 'period', 'month', 'quarter']), None)
+                with stage('history_charts'):
+                    time_col = find_time_column(df.columns)
                     if time_col:
                         st.markdown("### Historical Performance")
+                        history = engine.history_store(dataset)
                         for metric_type, col_name in metrics.items():
-                            if col_name in df.columns:
-                                fig = px.line(df, x=time_col, y=col_name, title=f"{metric_type.capitalize()} Trend")
-                                st.plotly_chart(fig, use_container_width=True)
+                            if col_name not in df.columns:
+                                continue
+                            if history is not None and selected_employee in employee_index:
+                                fig = history_figure(history, metric_type, col_name, selected_employee)
+                            else:
+                                # Time values we can't order chronologically are plotted as-is
+                                fig = line_figure(df, time_col, col_name, title=f"{metric_type.capitalize()} Trend")
+                            st.plotly_chart(fig, use_container_width=True)
         
         with tab3:
             st.markdown('<p class="sub-header">AI-Powered Team Insights</p>', unsafe_allow_html=True)
@@ -446,75 +595,65 @@ def main():
                                         "What are the top 3 performance issues in the team and how can we address them?")
                 
                 if st.button("Generate Insights"):
-                    with st.spinner("Analyzing..."):
+                    with stage('custom_question'):
                         # Create a comprehensive prompt with data summary
-                        ai_prompt = f"""
-                        Based on this employee performance data, answer the following question:
-                        
-                        "{user_prompt}"
-                        
-                        Data summary:
-                        - Total employees: {len(df)}
-                        - Columns available: {', '.join(df.columns.tolist())}
-                        - Key metrics: {', '.join([f"{k.capitalize()}: Avg={df[v].mean():.2f}, Min={df[v].min():.2f}, Max={df[v].max():.2f}" for k, v in metrics.items() if v in df.columns])}
-                        
-                        Please provide concrete, data-backed insights and actionable recommendations.
-                        """
-                        
-                        insights = get_ai_insights(df, ai_prompt)
-                        st.markdown(insights)
+                        ai_prompt = engine.build_question_prompt(dataset, user_prompt)
+                        insights = get_ai_insights(df, ai_prompt, stream=True)
+                    # Kept so the answer can be exported with the data
+                    if insights is not None:
+                        st.session_state.setdefault('custom_insights', {}).setdefault(dataset.key, {})[user_prompt] = insights
                 
                 # Performance improvement recommendations
                 st.markdown("### Team Performance Improvement Plan")
-                with st.spinner("Generating improvement plan..."):
-                    improvement_prompt = f"""
-                    Based on this team's performance data, create a structured improvement plan:
-                    
-                    Team data summary:
-                    - Total employees: {len(df)}
-                    - Key metrics: {', '.join([f"{k.capitalize()}: Avg={df[v].mean():.2f}, Min={df[v].min():.2f}, Max={df[v].max():.2f}" for k, v in metrics.items() if v in df.columns])}
-                    
-                    Please provide:
-                    1. Top 3 team strengths to leverage
-                    2. Top 3 improvement areas with specific action items
-                    3. Key performance indicators to track progress
-                    4. A 30-60-90 day implementation timeline
-                    
-                    Format as a clear, actionable plan.
-                    """
-                    
-                    improvement_plan = get_ai_insights(df, improvement_prompt)
-                    st.markdown(improvement_plan)
+                improvement_prompt = engine.build_improvement_prompt(dataset)
+                
+                with stage('improvement_plan'):
+                    show_ai_job('improvement_plan', improvement_prompt, "Generate improvement plan")
             else:
                 st.warning("Please enter your Gemini API key to unlock AI-powered insights.")
             
             # Export options
             st.markdown("### Export Options")
-            export_format = st.selectbox("Select export format:", ["CSV", "Excel"])
+            export_format = st.selectbox("Select export format:", list(EXPORT_FORMATS))
             
             if st.button("Export Data and Insights"):
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                if export_format == "CSV":
-                    csv = df.to_csv(index=False)
-                    st.download_button(
-                        label="Download CSV",
-                        data=csv,
-                        file_name=f"performx_analysis_{timestamp}.csv",
-                        mime="text/csv"
-                    )
-                else:
-                    # Create a buffer to store Excel file
-                    buffer = StringIO()
-                    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                        df.to_excel(writer, sheet_name='Performance Data', index=False)
+                with stage('export'):
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    file_format = EXPORT_FORMATS[export_format]
+                    insights, employee_analyses = collect_insights(dataset)
                     
-                    st.download_button(
-                        label="Download Excel",
-                        data=buffer.getvalue(),
-                        file_name=f"performx_analysis_{timestamp}.xlsx",
-                        mime="application/vnd.ms-excel"
-                    )
+                    # Artifacts are reused until the data or the included insights change
+                    try:
+                        path = get_export_cache().get_or_build(dataset.key, export_format, df,
+                                                               insights, employee_analyses)
+                    except (ImportError, ValueError) as e:
+                        st.error(f"{export_format} export is unavailable: {e}")
+                    else:
+                        with open(path, 'rb') as f:
+                            st.download_button(
+                                label=f"Download {export_format}",
+                                data=f,
+                                file_name=f"performx_analysis_{timestamp}.{file_format['extension']}",
+                                mime=file_format['mime']
+                            )
+                        
+                        # CSV has no room for the insights, so offer them as a separate file
+                        if export_format.startswith("CSV") and (insights or employee_analyses):
+                            st.download_button(
+                                label="Download AI Insights",
+                                data=insights_markdown(insights, employee_analyses),
+                                file_name=f"performx_insights_{timestamp}.md",
+                                mime="text/markdown"
+                            )
 
 # Run the app
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if METRICS_PORT:
+        get_metrics_server()
+    
+    # Every rerun is timed; its stages feed the diagnostics panel and the metrics
+    with trace() as rerun:
+        main()
+    show_diagnostics(rerun)
+    if METRICS_FILE:
+        write_metrics_file(METRICS_FILE)
\ No newline at end of file
@@ -0,0 +1,3 @@
+"""
+Synthetic data and timing harness for the Performance Tracker (see `benchmarks.run`).
+"""
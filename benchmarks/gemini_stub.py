@@ -0,0 +1,78 @@
+"""
+Local stand-in for the Gemini API with configurable latency.
+
+Within `stub_gemini()`, the client's `GenerativeModel` returns a model that sleeps
+instead of calling the network and answers with deterministic text whose size
+follows the prompt, so AI code paths can be timed offline and repeatably.
+Batched employee prompts get one marked section per listed employee, as the
+real model is instructed to produce.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from performance_tracker import ai
+from performance_tracker.prompts import MARKER
+
+DEFAULT_LATENCY_SECONDS = 0.5
+DEFAULT_RESPONSE_WORDS = 250
+STREAM_CHUNKS = 5
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """
+    Answers `generate_content` after `latency` seconds, streamed or whole
+    """
+
+    calls = 0
+    _lock = threading.Lock()
+
+    def __init__(self, model_name, latency=DEFAULT_LATENCY_SECONDS, response_words=DEFAULT_RESPONSE_WORDS):
+        self.model_name = model_name
+        self.latency = latency
+        self.response_words = response_words
+
+    def generate_content(self, prompt, stream=False):
+        with StubModel._lock:
+            StubModel.calls += 1
+        text = self._answer(prompt)
+        if not stream:
+            time.sleep(self.latency)
+            return StubResponse(text)
+        return self._stream(text)
+
+    def _stream(self, text):
+        words = text.split(' ')
+        size = -(-len(words) // STREAM_CHUNKS)
+        for start in range(0, len(words), size):
+            time.sleep(self.latency / STREAM_CHUNKS)
+            yield StubResponse(' '.join(words[start:start + size]) + ' ')
+
+    def _answer(self, prompt):
+        seed = sum(prompt.encode('utf-8')) % 997
+        text = ' '.join(f"insight{(seed + i) % 97}" for i in range(self.response_words))
+        if MARKER.format('<employee id>') not in prompt:
+            return text
+        listed = prompt.split("Employees:\n", 1)[1].split("\n\n", 1)[0]
+        employee_ids = [line[2:].split(':', 1)[0] for line in listed.splitlines() if line.startswith('- ')]
+        return '\n\n'.join(f"{MARKER.format(employee_id)}\n{text}" for employee_id in employee_ids)
+
+
+@contextmanager
+def stub_gemini(latency=DEFAULT_LATENCY_SECONDS, response_words=DEFAULT_RESPONSE_WORDS):
+    """
+    Replace the Gemini model with `StubModel` for the duration of the block
+    """
+    genai = ai.client()
+    original = genai.GenerativeModel
+    genai.GenerativeModel = lambda model_name, **kwargs: StubModel(model_name, latency, response_words)
+    StubModel.calls = 0
+    try:
+        yield StubModel
+    finally:
+        genai.GenerativeModel = original
@@ -0,0 +1,320 @@
+"""
+Benchmark harness for the Performance Tracker hot paths.
+
+For each dataset size a synthetic CSV is generated, then every stage the app
+runs on a page load is timed: ingestion, metric extraction, summary
+statistics, lookup structures, team table queries, rollups, color-coded table
+rendering, chart building (including JSON serialization, which is what
+Streamlit ships to the browser), prompt construction and the Gemini calls,
+the latter against a local stub with configurable latency.
+
+    python -m benchmarks.run --rows 10000 1000000 --save benchmarks/results/main.json
+    python -m benchmarks.run --rows 10000 1000000 --compare benchmarks/results/main.json
+
+Results are written as JSON; `--compare` reports stages that got slower than
+the saved baseline by more than `--tolerance` and exits non-zero if any did.
+The cold-start budget from `benchmarks.startup` is checked last and fails the
+run the same way (`--skip-startup` leaves it out).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import startup
+from benchmarks.gemini_stub import stub_gemini
+from benchmarks.synthetic import DEFAULT_MISSING, generate_dataset
+from performance_tracker import engine, prompts, schema
+from performance_tracker.ai import generate_insight
+from performance_tracker.charts import histogram_figure, history_figure
+from performance_tracker.dataset_cache import Dataset
+from performance_tracker.employees import EmployeeIndex
+from performance_tracker.history import HistoryStore, build_periods
+from performance_tracker.rollups import RollupCube
+from performance_tracker.summary import SummaryStats
+from performance_tracker.tables import TeamTable, metric_ranges, render_colored_table
+
+DEFAULT_ROWS = [10_000, 100_000]
+DEFAULT_TOLERANCE = 0.25
+# Differences below this are timer noise, not regressions
+NOISE_FLOOR_SECONDS = 0.005
+PAGE_SIZE = 50
+
+
+def stage_ingest(ctx):
+    ctx['df'], ctx['schema'] = engine.prepare_dataset(ctx['csv_bytes'])
+    ctx['dataset'] = Dataset('benchmark', ctx['df'], ctx['schema'])
+
+
+def stage_metric_extraction(ctx):
+    # Time the real inference, not the memoized lookup
+    schema.clear_memo()
+    schema.infer_metric_columns(ctx['df'])
+    ctx['metrics'] = schema.extract_performance_metrics(ctx['df'])
+
+
+def stage_summary_stats(ctx):
+    summary = SummaryStats(ctx['df'], ctx['metrics'].values())
+    summary.metrics_table(ctx['metrics'])
+    summary.quantiles
+    ctx['summary'] = summary
+
+
+def stage_employee_index(ctx):
+    ctx['index'] = EmployeeIndex(ctx['df'], 'employee_id', ctx['metrics'])
+    ctx['employee_id'] = ctx['index'].ids[len(ctx['index']) // 2]
+
+
+def stage_team_table(ctx):
+    table = TeamTable(ctx['df'])
+    sort_col = next(iter(ctx['metrics'].values()))
+    positions = table.query(sort_col, False, None)
+    table.page(positions, 1, PAGE_SIZE)
+    mask = table.filter_mask({'department': ['Sales']}, 'e00', ['employee_id', 'name'])
+    table.page(table.query(sort_col, True, mask), 1, PAGE_SIZE)
+    table.top_n(sort_col, 5)
+
+
+def stage_rollups(ctx):
+    cube = RollupCube(ctx['df'], ctx['metrics'], 'employee_id', build_periods(ctx['df']))
+    departments = cube.drill()
+    managers = cube.drill([departments.index[0]])
+    cube.drill([departments.index[0], managers.index[0]], cube.periods()[-1])
+    cube.manager_rollup(managers.index[0])
+    prompts.breakdown_block(departments, 'department', cube.metric_cols, list(cube.attainment))
+
+
+def stage_color_table(ctx):
+    df = ctx['df']
+    cols = [col for col in ctx['metrics'].values() if col in df.columns]
+    ranges = metric_ranges(df, cols)
+    render_colored_table(df, cols, 0, min(PAGE_SIZE, len(df)), ranges)
+
+
+def stage_histogram(ctx):
+    col = next(iter(ctx['metrics'].values()))
+    histogram_figure(ctx['df'][col], title=col).to_json()
+
+
+def stage_history(ctx):
+    periods = build_periods(ctx['df'])
+    history = HistoryStore(ctx['df'], 'employee_id', ctx['metrics'], periods)
+    for metric_type, col in ctx['metrics'].items():
+        history_figure(history, metric_type, col, ctx['employee_id']).to_json()
+
+
+def stage_prompts(ctx):
+    df, metrics, index = ctx['df'], ctx['metrics'], ctx['index']
+    context = prompts.team_context(ctx['summary'], metrics, len(df), len(index))
+    prompts.team_prompt(context)
+    prompts.improvement_prompt(context)
+    prompts.question_prompt(context, df.columns, "What are the top 3 performance issues?")
+    fields = prompts.employee_fields(df.columns, metrics, ctx['schema'].get('metric_groups'), 'employee_id')
+    for employee_id in index.ids[:100]:
+        prompts.employee_prompt(employee_id, index.details(employee_id, fields), context)
+
+
+def stage_ai_team_insights(ctx):
+    generate_insight(engine.build_team_prompt(ctx['dataset']))
+
+
+def stage_ai_batch(ctx):
+    ids = ctx['index'].ids[:ctx['batch_size']]
+    results = list(engine.analyze_all_employees(ctx['dataset'], ids, concurrency=ctx['concurrency'],
+                                                rate_per_minute=0, per_request=ctx['per_request']))
+    failed = [result for result in results if not result.ok]
+    if failed:
+        raise RuntimeError(f"{len(failed)} stub analyses failed: {failed[0].error}")
+
+
+STAGES = [
+    ('ingest', stage_ingest),
+    ('metric_extraction', stage_metric_extraction),
+    ('summary_stats', stage_summary_stats),
+    ('employee_index', stage_employee_index),
+    ('team_table', stage_team_table),
+    ('rollups', stage_rollups),
+    ('color_table', stage_color_table),
+    ('histogram', stage_histogram),
+    ('history', stage_history),
+    ('prompts', stage_prompts),
+    ('ai_team_insights', stage_ai_team_insights),
+    ('ai_batch', stage_ai_batch),
+]
+
+
+def run_case(rows, extra_metrics=0, repeat=3, memory=False, batch_size=20, concurrency=8,
+             per_request=prompts.DEFAULT_EMPLOYEES_PER_REQUEST, seed=0, missing=DEFAULT_MISSING):
+    """
+    Time every stage on a generated dataset; returns {stage: timings}
+    """
+    df = generate_dataset(rows, extra_metrics=extra_metrics, seed=seed, missing=missing)
+    ctx = {
+        'csv_bytes': df.to_csv(index=False).encode('utf-8'),
+        'batch_size': batch_size,
+        'concurrency': concurrency,
+        'per_request': per_request,
+    }
+    del df
+
+    results = {}
+    for name, stage in STAGES:
+        runs = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            stage(ctx)
+            runs.append(time.perf_counter() - started)
+        results[name] = {'min': min(runs), 'median': statistics.median(runs), 'runs': runs}
+
+        if memory:
+            # Traced separately since tracemalloc slows allocation-heavy code
+            tracemalloc.start()
+            stage(ctx)
+            results[name]['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    results['_dataset'] = {'rows': len(ctx['df']), 'columns': len(ctx['df'].columns),
+                           'csv_bytes': len(ctx['csv_bytes']),
+                           'memory_bytes': int(ctx['df'].memory_usage(deep=True).sum())}
+    return results
+
+
+def case_name(rows, extra_metrics):
+    return f"rows={rows},extra_metrics={extra_metrics}"
+
+
+def environment():
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                  text=True, cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except OSError:
+        revision = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_revision': revision,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+    }
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Stages slower than the baseline by more than `tolerance`, as (case, stage, before, after)
+    """
+    regressions = []
+    for case, stages in current['cases'].items():
+        before_stages = baseline.get('cases', {}).get(case)
+        if not before_stages:
+            continue
+        for stage, timing in stages.items():
+            before = before_stages.get(stage, {}).get('min')
+            if stage.startswith('_') or before is None:
+                continue
+            after = timing['min']
+            if after > before * (1 + tolerance) and after - before > NOISE_FLOOR_SECONDS:
+                regressions.append((case, stage, before, after))
+    return regressions
+
+
+def print_case(case, stages, baseline_stages=None):
+    info = stages['_dataset']
+    print(f"\n{case}  ({info['rows']:,} rows × {info['columns']} columns, "
+          f"{info['csv_bytes'] / 1e6:,.1f} MB CSV, {info['memory_bytes'] / 1e6:,.1f} MB in memory)")
+    for stage, timing in stages.items():
+        if stage.startswith('_'):
+            continue
+        line = f"  {stage:<20} {timing['min'] * 1000:>10.1f} ms  (median {timing['median'] * 1000:.1f} ms)"
+        if 'peak_bytes' in timing:
+            line += f"  peak {timing['peak_bytes'] / 1e6:,.1f} MB"
+        before = (baseline_stages or {}).get(stage, {}).get('min')
+        if before:
+            line += f"  {timing['min'] / before:>5.2f}× baseline"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run",
+                                     description="Time the app's hot paths on synthetic data.")
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--extra-metrics', type=int, nargs='+', default=[0],
+                        help="additional numeric columns per case, e.g. 0 1000")
+    parser.add_argument('--missing', type=float, default=DEFAULT_MISSING,
+                        help="share of blank cells in the generated data (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--memory', action='store_true', help="also record peak traced memory per stage")
+    parser.add_argument('--latency', type=float, default=0.2, help="stub Gemini latency in seconds")
+    parser.add_argument('--batch-size', type=int, default=20, help="employees analyzed in the batch stage")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--per-request', type=int, default=prompts.DEFAULT_EMPLOYEES_PER_REQUEST,
+                        help="employees packed into one stub request in the batch stage")
+    parser.add_argument('--skip-startup', action='store_true', help="don't check the cold-start budget")
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help="multiply every cold-start budget, e.g. 2 on slow machines (default: %(default)s)")
+    parser.add_argument('--save', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="baseline results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown before a stage counts as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    current = {'environment': environment(),
+               'settings': {'repeat': args.repeat, 'latency': args.latency,
+                            'batch_size': args.batch_size, 'concurrency': args.concurrency,
+                            'per_request': args.per_request, 'missing': args.missing},
+               'cases': {}}
+    with stub_gemini(latency=args.latency):
+        for extra_metrics in args.extra_metrics:
+            for rows in args.rows:
+                case = case_name(rows, extra_metrics)
+                current['cases'][case] = run_case(rows, extra_metrics, args.repeat, args.memory,
+                                                  args.batch_size, args.concurrency, args.per_request,
+                                                  missing=args.missing)
+                print_case(case, current['cases'][case], (baseline or {}).get('cases', {}).get(case))
+
+    problems = []
+    if not args.skip_startup:
+        current['startup'] = startup.measure_all(args.repeat)
+        startup.print_results(current['startup'], args.budget_scale)
+        problems = startup.violations(current['startup'], args.budget_scale)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    status = 0
+    if problems:
+        print(f"\n{len(problems)} cold-start problem(s):")
+        for problem in problems:
+            print(f"  {problem}")
+        status = 1
+
+    if baseline is not None:
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for case, stage, before, after in regressions:
+                print(f"  {case} {stage}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+            return 1
+        print("\nNo regressions against the baseline.")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
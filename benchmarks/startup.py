@@ -0,0 +1,112 @@
+"""
+Cold-start budget for the app, the engine and the command line.
+
+Each target runs in a fresh interpreter, so nothing is in `sys.modules` yet:
+the engine and CLI are imported, and the app renders its first page with no
+file uploaded (what every new session and container start pays for). The
+best of `--repeat` runs must stay within the target's budget, and none of
+the libraries that should load lazily (the Gemini client, plotting
+libraries) may have been imported.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --budget-scale 2    # slower machines
+
+`benchmarks.run` runs the same check after its dataset cases.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, 'app.py')
+
+DEFAULT_REPEAT = 3
+# Imported only when a feature needs them
+LAZY_MODULES = ('google.generativeai', 'matplotlib', 'seaborn')
+
+# name: (code run in the fresh interpreter, budget in seconds, modules that must not be loaded)
+TARGETS = {
+    'engine': ("import performance_tracker.engine", 0.75, LAZY_MODULES + ('plotly',)),
+    'cli': ("import performance_tracker.cli", 0.75, LAZY_MODULES + ('plotly',)),
+    # Streamlit itself accounts for most of this; it also imports plotly.graph_objects (a lazy module)
+    'app_first_page': ("from streamlit.testing.v1 import AppTest\n"
+                       f"AppTest.from_file({APP!r}, default_timeout=60).run()", 2.0, LAZY_MODULES),
+}
+
+_PROBE = """\
+import json, sys, time
+started = time.perf_counter()
+{code}
+seconds = time.perf_counter() - started
+print(json.dumps({{'seconds': seconds, 'loaded': [name for name in {lazy!r} if name in sys.modules]}}))
+"""
+
+
+def measure(name, repeat=DEFAULT_REPEAT):
+    """
+    Time one target in `repeat` fresh interpreters; returns its timings and any lazy modules it loaded
+    """
+    code, budget, lazy = TARGETS[name]
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')]))}
+    runs, loaded = [], set()
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, '-c', _PROBE.format(code=code, lazy=lazy)], cwd=ROOT,
+                                   env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"{name} failed to start:\n{completed.stderr}")
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        runs.append(result['seconds'])
+        loaded.update(result['loaded'])
+    return {'min': min(runs), 'median': statistics.median(runs), 'runs': runs,
+            'budget': budget, 'loaded': sorted(loaded)}
+
+
+def measure_all(repeat=DEFAULT_REPEAT):
+    return {name: measure(name, repeat) for name in TARGETS}
+
+
+def violations(results, budget_scale=1.0):
+    """
+    Human-readable descriptions of every target over budget or loading a lazy module
+    """
+    problems = []
+    for name, result in results.items():
+        budget = result['budget'] * budget_scale
+        if result['min'] > budget:
+            problems.append(f"{name}: {result['min'] * 1000:.0f} ms exceeds the {budget * 1000:.0f} ms budget")
+        if result['loaded']:
+            problems.append(f"{name}: imported {', '.join(result['loaded'])} at startup")
+    return problems
+
+
+def print_results(results, budget_scale=1.0):
+    print("\nstartup")
+    for name, result in results.items():
+        line = (f"  {name:<20} {result['min'] * 1000:>10.1f} ms  (median {result['median'] * 1000:.1f} ms)"
+                f"  budget {result['budget'] * budget_scale * 1000:.0f} ms")
+        if result['loaded']:
+            line += f"  loaded {', '.join(result['loaded'])}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup",
+                                     description="Check cold-start time against its budget.")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help="multiply every budget, e.g. 2 on slow machines (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    results = measure_all(args.repeat)
+    print_results(results, args.budget_scale)
+    problems = violations(results, args.budget_scale)
+    for problem in problems:
+        print(f"  {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Synthetic employee performance data with the schema of `sample_employee_data.csv`.
+
+Employees belong to departments with fixed managers and roles, appear once per
+monthly period, and have metrics driven by a shared per-employee ability plus
+noise, so they correlate the way real scores do. Sizes scale to millions of
+rows, and `extra_metrics` adds numeric columns to test wide files. Like real
+exports, a `missing` share of the cells outside the key columns is blank.
+
+    python -m benchmarks.synthetic --rows 1000000 --extra-metrics 500 -o big.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+DEPARTMENTS = {
+    'Sales': ['Associate', 'Senior Associate', 'Account Manager', 'Team Lead'],
+    'Marketing': ['Associate', 'Content Creator', 'Digital Specialist', 'Manager'],
+    'Engineering': ['Developer', 'Senior Developer', 'QA Engineer', 'DevOps Engineer', 'UI Designer'],
+    'Customer Service': ['Representative', 'Senior Representative', 'Team Lead'],
+    'Finance': ['Analyst', 'Senior Analyst'],
+    'HR': ['Specialist', 'Manager'],
+    'IT Support': ['Support Specialist', 'Technical Lead'],
+}
+# Departments that carry sales targets, with the typical target per period
+SALES_TARGETS = {'Sales': 100000, 'Marketing': 80000, 'Customer Service': 50000}
+# Roughly one manager per this many employees
+TEAM_SIZE = 8
+# Share of blank cells per column, and the columns that are never blank
+DEFAULT_MISSING = 0.01
+KEY_COLUMNS = ('employee_id', 'month', 'year')
+
+FIRST_NAMES = ['John', 'Emily', 'Michael', 'Sarah', 'David', 'Jessica', 'Robert', 'Jennifer', 'William',
+               'Linda', 'James', 'Maria', 'Daniel', 'Laura', 'Thomas', 'Anna', 'Kevin', 'Priya', 'Wei', 'Fatima']
+LAST_NAMES = ['Smith', 'Johnson', 'Brown', 'Davis', 'Wilson', 'Miller', 'Taylor', 'Anderson', 'Thomas',
+              'Moore', 'Martin', 'Lee', 'Garcia', 'Clark', 'Lewis', 'Walker', 'Patel', 'Chen', 'Khan', 'Lopez']
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+
+
+def generate_employees(count, seed=0):
+    """
+    One row per employee: ID, name, department, role, manager and joining date
+    """
+    rng = np.random.default_rng(seed)
+    departments = np.array(list(DEPARTMENTS), dtype=object)
+    dept_codes = rng.integers(0, len(departments), count)
+
+    roles = np.empty(count, dtype=object)
+    managers = np.empty(count, dtype=object)
+    next_manager = 101
+    for code, department in enumerate(departments):
+        members = np.flatnonzero(dept_codes == code)
+        dept_roles = np.array(DEPARTMENTS[department], dtype=object)
+        roles[members] = dept_roles[rng.integers(0, len(dept_roles), len(members))]
+        manager_count = max(1, len(members) // TEAM_SIZE)
+        manager_ids = np.array([f"M{next_manager + i}" for i in range(manager_count)], dtype=object)
+        managers[members] = manager_ids[rng.integers(0, manager_count, len(members))]
+        next_manager += manager_count
+
+    first = np.array(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), count)]
+    last = np.array(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), count)]
+    joined = np.datetime64('2024-01-01') - rng.integers(30, 15 * 365, count).astype('timedelta64[D]')
+
+    return pd.DataFrame({
+        'employee_id': [f"E{i:06d}" for i in range(1, count + 1)],
+        'name': first + ' ' + last,
+        'department': departments[dept_codes],
+        'role': roles,
+        'manager_id': managers,
+        'joining_date': np.datetime_as_string(joined, unit='D'),
+    })
+
+
+def generate_dataset(rows, employees=None, extra_metrics=0, seed=0, start_year=2023, missing=DEFAULT_MISSING):
+    """
+    A performance dataset of `rows` rows: every employee once per month, in period order.
+
+    `employees` defaults to a twelfth of the rows, i.e. about a year of history.
+    """
+    employees = max(1, min(rows, employees or rows // 12 or 1))
+    rng = np.random.default_rng(seed)
+    staff = generate_employees(employees, seed)
+
+    person = np.arange(rows) % employees
+    period = np.arange(rows) // employees
+    # Columns are collected first and framed once; adding thousands one at a time fragments the frame
+    columns = {col: staff[col].to_numpy()[person] for col in staff.columns}
+
+    # Ability is per employee and drifts slowly; every metric loads on it
+    ability = rng.standard_normal(employees)[person] + 0.02 * period * rng.standard_normal(employees)[person]
+
+    def score(mean, spread, weight, low=0, high=100):
+        noise = rng.standard_normal(rows)
+        return np.clip(mean + spread * (weight * ability + np.sqrt(1 - weight ** 2) * noise), low, high)
+
+    target_base = pd.Series(columns['department']).map(SALES_TARGETS).fillna(0).to_numpy(dtype=np.float64)
+    targets = np.round(target_base * rng.uniform(0.8, 1.2, employees)[person] / 5000) * 5000
+    attainment = np.clip(1 + 0.12 * ability + 0.08 * rng.standard_normal(rows), 0.3, 1.6)
+
+    columns['performance_score'] = score(78, 8, 0.9).round().astype(np.int64)
+    columns['sales_target'] = targets.astype(np.int64)
+    columns['sales_achieved'] = (np.round(targets * attainment / 1000) * 1000).astype(np.int64)
+    columns['quality_score'] = score(85, 6, 0.7).round().astype(np.int64)
+    columns['productivity_rate'] = score(82, 7, 0.8).round().astype(np.int64)
+    columns['attendance_percentage'] = score(93, 3, 0.4, 60, 100).round().astype(np.int64)
+    columns['projects_completed'] = rng.poisson(np.clip(6 + 2 * ability, 0.5, None)).astype(np.int64)
+    columns['customer_satisfaction'] = score(4.3, 0.3, 0.7, 1, 5).round(1)
+    columns['training_hours'] = rng.integers(0, 40, rows)
+
+    for i in range(extra_metrics):
+        columns[f"kpi_{i + 1:04d}"] = score(50, 15, rng.uniform(0, 0.9), -1e9, 1e9).round(2)
+
+    columns['month'] = np.array(MONTHS, dtype=object)[period % 12]
+    columns['year'] = start_year + period // 12
+
+    if missing:
+        for col, values in columns.items():
+            if col not in KEY_COLUMNS:
+                columns[col] = _blank(values, rng.random(rows) < missing)
+    return pd.DataFrame(columns)
+
+
+def _blank(values, mask):
+    # Integer columns become float so they can hold NaN, as pandas reads them
+    values = values.astype(object if values.dtype.kind in 'OUS' else np.float64)
+    values[mask] = np.nan
+    return values
+
+
+def write_dataset(path, rows, **kwargs):
+    """
+    Generate a dataset and write it as CSV to `path`
+    """
+    df = generate_dataset(rows, **kwargs)
+    df.to_csv(path, index=False)
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic",
+                                     description="Write a synthetic employee performance CSV.")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--employees', type=int, default=None,
+                        help="distinct employees (default: rows / 12, a year of monthly history)")
+    parser.add_argument('--extra-metrics', type=int, default=0, help="additional numeric KPI columns")
+    parser.add_argument('--missing', type=float, default=DEFAULT_MISSING,
+                        help="share of blank cells outside the key columns (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default='synthetic_employee_data.csv')
+    args = parser.parse_args(argv)
+
+    df = write_dataset(args.output, args.rows, employees=args.employees,
+                       extra_metrics=args.extra_metrics, seed=args.seed, missing=args.missing)
+    print(f"Wrote {len(df):,} rows × {len(df.columns)} columns to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
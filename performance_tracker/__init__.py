@@ -0,0 +1,3 @@
+"""
+Data and AI helpers behind the Performance Tracker Streamlit app.
+"""
@@ -0,0 +1,5 @@
+import sys
+
+from performance_tracker.cli import main
+
+sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Gemini calls used by the app, independent of Streamlit.
+
+The client library takes longer to import than the rest of the app put
+together, so it is only imported when the first call is made. `configure()`
+just records the API key; the client is configured with it once, on that
+first call, and reused by every later call in the process.
+"""
+import threading
+import time
+
+from performance_tracker.ai_cache import prompt_key
+from performance_tracker.instrumentation import REGISTRY
+
+DEFAULT_MODEL = "gemini-pro"
+# Rough size of a token in characters for English text, used for estimates only
+CHARS_PER_TOKEN = 4
+
+_api_key = None
+_configured_key = None
+_configure_lock = threading.Lock()
+
+
+def configure(api_key):
+    """
+    Set the API key used by every Gemini call in this process
+    """
+    global _api_key
+    _api_key = api_key
+
+
+def client():
+    """
+    The `google.generativeai` module, imported and configured on first use
+    """
+    global _configured_key
+    import google.generativeai as genai
+
+    if _api_key is not None and _configured_key != _api_key:
+        with _configure_lock:
+            if _configured_key != _api_key:
+                genai.configure(api_key=_api_key)
+                _configured_key = _api_key
+    return genai
+
+
+def estimate_tokens(text):
+    """
+    Approximate token count of `text` without calling the API
+    """
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def generate_insight(prompt, cache=None, model_name=DEFAULT_MODEL, rate_limiter=None):
+    """
+    Return the model's response text for `prompt`, serving repeats from `cache`.
+
+    `rate_limiter` is only consulted when the API is actually called. Errors
+    from the API are raised to the caller and never cached.
+    """
+    key = prompt_key(model_name, prompt)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    if rate_limiter is not None:
+        rate_limiter.acquire()
+    started = time.perf_counter()
+    try:
+        model = client().GenerativeModel(model_name)
+        response = model.generate_content(prompt)
+        text = response.text
+    except Exception:
+        _record_call(model_name, prompt, None, started)
+        raise
+    _record_call(model_name, prompt, text, started)
+    if cache is not None:
+        cache.put(key, text)
+    return text
+
+
+def stream_insight(prompt, cache=None, model_name=DEFAULT_MODEL, rate_limiter=None):
+    """
+    Yield the model's response to `prompt` in chunks as they are generated.
+
+    A cached response is yielded as a single chunk. The full text is cached
+    once the stream completes; an interrupted stream is not cached.
+    """
+    key = prompt_key(model_name, prompt)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    if rate_limiter is not None:
+        rate_limiter.acquire()
+    started = time.perf_counter()
+    parts = []
+    try:
+        model = client().GenerativeModel(model_name)
+        for chunk in model.generate_content(prompt, stream=True):
+            text = chunk.text
+            if text:
+                if not parts:
+                    REGISTRY.observe('gemini_first_chunk_seconds', time.perf_counter() - started, model=model_name)
+                parts.append(text)
+                yield text
+    except Exception:
+        _record_call(model_name, prompt, None, started)
+        raise
+    _record_call(model_name, prompt, "".join(parts), started)
+    if cache is not None:
+        cache.put(key, "".join(parts))
+
+
+def _record_call(model_name, prompt, response, started):
+    REGISTRY.inc('gemini_requests_total', model=model_name, outcome='error' if response is None else 'ok')
+    REGISTRY.observe('gemini_request_seconds', time.perf_counter() - started, model=model_name)
+    REGISTRY.observe('gemini_prompt_tokens', estimate_tokens(prompt), model=model_name)
+    if response is not None:
+        REGISTRY.observe('gemini_response_tokens', estimate_tokens(response), model=model_name)
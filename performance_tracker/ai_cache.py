@@ -0,0 +1,148 @@
+"""
+Prompt-keyed cache for Gemini responses.
+
+Responses live in an in-memory LRU in front of a SQLite file on local disk,
+so they are shared by every session on the server and survive restarts.
+Entries expire after `ttl_seconds`; both tiers are capped by entry count and
+evict least-recently-used entries first. Memory hits are written back to the
+SQLite access times in batches, so hot entries are not the first evicted from
+disk.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from performance_tracker.config import CACHE_DIR
+from performance_tracker.instrumentation import record_cache_lookup
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+# Memory hits buffered before their access times are written to SQLite
+TOUCH_BATCH_SIZE = 100
+
+
+def prompt_key(model_name, prompt):
+    """
+    Return the cache key for a prompt sent to `model_name`
+    """
+    return hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier (memory + SQLite) LRU cache of model responses with a TTL
+    """
+
+    def __init__(self, cache_dir=None, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_entries=5000, max_memory_entries=500):
+        cache_dir = cache_dir or CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "ai_responses.sqlite3")
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        self._touched = {}
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def get(self, key):
+        """
+        Return the cached response for `key`, or None if missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                response, created = entry
+                if now - created <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._touched[key] = now
+                    flush = len(self._touched) >= TOUCH_BATCH_SIZE
+                else:
+                    del self._memory[key]
+                    entry = None
+        if entry is not None:
+            if flush:
+                with self._connect() as conn:
+                    self._flush_touches(conn)
+            record_cache_lookup('responses', 'memory')
+            return response
+
+        with self._connect() as conn:
+            self._flush_touches(conn)
+            row = conn.execute(
+                "SELECT response, created FROM responses WHERE key = ? AND created >= ?",
+                (key, now - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                record_cache_lookup('responses', 'miss')
+                return None
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+
+        response, created = row
+        self._remember(key, response, created)
+        record_cache_lookup('responses', 'disk')
+        return response
+
+    def put(self, key, response):
+        now = time.time()
+        self._remember(key, response, now)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            # Eviction must see the accesses served from memory
+            self._flush_touches(conn)
+            self._evict(conn, now)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def _remember(self, key, response, created):
+        with self._lock:
+            self._memory[key] = (response, created)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _flush_touches(self, conn):
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            conn.executemany("UPDATE responses SET accessed = ? WHERE key = ?",
+                             [(accessed, key) for key, accessed in touched.items()])
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            " SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps this safe to use from any thread
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
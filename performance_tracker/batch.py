@@ -0,0 +1,126 @@
+"""
+Concurrent fan-out of per-item work (e.g. one Gemini analysis per employee).
+
+`run_batch` runs a worker over many items on a thread pool, retrying transient
+failures (rate limits, server errors, timeouts) with exponential backoff, and
+yields results as they complete so the caller
+can show progress. Pair it with a shared `RateLimiter` to stay under the API
+quota regardless of concurrency.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+# HTTP statuses worth retrying: rate limited, or a server-side failure
+RETRY_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter allowing at most `rate_per_minute` acquisitions per minute
+    """
+
+    def __init__(self, rate_per_minute):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        # Reserve the next free slot under the lock, then sleep outside it
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class BatchResult:
+    """
+    Outcome of one item in a batch
+    """
+
+    def __init__(self, item, value=None, error=None, attempts=1):
+        self.item = item
+        self.value = value
+        self.error = error
+        self.attempts = attempts
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def retryable(self):
+        """
+        Whether running the item again might succeed (its error was transient)
+        """
+        return self.error is not None and is_transient(self.error)
+
+
+def is_transient(error):
+    """
+    Whether `error` may succeed on retry: timeouts, dropped connections, 429s and 5xx responses
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # google.api_core errors carry the HTTP status as `code`; HTTP client errors on their response
+    status = getattr(error, 'code', None)
+    if not isinstance(status, int):
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status in RETRY_STATUS_CODES
+
+
+def call_with_retry(fn, *args, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF_SECONDS):
+    """
+    Call `fn(*args)`, retrying transient errors up to `retries` times with jittered exponential backoff.
+
+    Returns `(value, attempts)`. Other errors (bad credentials, blocked
+    prompts, ...) are raised at once, the last transient one once retries run out;
+    either way the raised exception carries the number of calls made as `attempts`.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return fn(*args), attempt
+        except Exception as e:
+            if attempt > retries or not is_transient(e):
+                e.attempts = attempt
+                raise
+            delay = min(MAX_BACKOFF_SECONDS, backoff * 2 ** (attempt - 1))
+            time.sleep(delay + random.uniform(0, backoff))
+
+
+def run_batch(items, worker, concurrency=DEFAULT_CONCURRENCY, retries=DEFAULT_RETRIES,
+              backoff=DEFAULT_BACKOFF_SECONDS):
+    """
+    Run `worker(item)` for every item and yield a `BatchResult` as each finishes.
+
+    Results arrive in completion order, not input order. Failures are reported
+    on the result rather than raised, so one bad item doesn't stop the batch.
+    """
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch")
+    try:
+        futures = {
+            pool.submit(call_with_retry, worker, item, retries=retries, backoff=backoff): item
+            for item in items
+        }
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                value, attempts = future.result()
+                yield BatchResult(item, value=value, attempts=attempts)
+            except Exception as e:
+                yield BatchResult(item, error=e, attempts=getattr(e, 'attempts', 1))
+    finally:
+        # Stop queued work if the caller abandons the batch early
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,106 @@
+"""
+Plotly figure builders that keep chart payloads small.
+
+Distributions are binned on the server with NumPy so the figure carries only
+bin edges and counts, never the raw column. Point-level line charts use WebGL
+(Scattergl) traces, and callers are expected to pass pre-aggregated or
+downsampled series (see `performance_tracker.history`).
+
+Plotly is imported inside the builders, so importing this module stays cheap
+until a chart is actually drawn.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_BINS = 10
+
+
+def bin_values(values, nbins=DEFAULT_BINS):
+    """
+    Return `(counts, edges)` for the non-missing values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return np.zeros(0, dtype=np.int64), np.zeros(1)
+    return np.histogram(values, bins=nbins)
+
+
+def histogram_figure(series, nbins=DEFAULT_BINS, title=None):
+    """
+    Bar chart of a pre-binned distribution
+    """
+    import plotly.graph_objects as go
+
+    counts, edges = bin_values(pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan),
+                               nbins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    labels = [f"{lo:,.2f} – {hi:,.2f}" for lo, hi in zip(edges[:-1], edges[1:])]
+
+    fig = go.Figure(go.Bar(
+        x=centers,
+        y=counts,
+        width=np.diff(edges),
+        customdata=labels,
+        hovertemplate="%{customdata}<br>count=%{y}<extra></extra>",
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title=series.name,
+        yaxis_title="count",
+        bargap=0,
+    )
+    return fig
+
+
+def history_figure(history, metric_type, col_name, employee_id):
+    """
+    Trend of one metric for an employee against their department and the team
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+
+    team_x, team_y = history.team_series(col_name)
+    fig.add_trace(go.Scattergl(x=team_x, y=team_y, mode='lines', name='Team average',
+                               line=dict(dash='dot')))
+
+    department = history.employee_department(employee_id)
+    department_series = history.department_series(department, col_name) if department is not None else None
+    if department_series is not None:
+        fig.add_trace(go.Scattergl(x=department_series[0], y=department_series[1], mode='lines',
+                                   name=f"{department} average", line=dict(dash='dash')))
+
+    employee_series = history.employee_series(employee_id, col_name)
+    if employee_series is not None:
+        fig.add_trace(go.Scattergl(x=employee_series[0], y=employee_series[1], mode='lines+markers',
+                                   name=str(employee_id)))
+
+    fig.update_layout(title=f"{metric_type.capitalize()} Trend", yaxis_title=col_name)
+    return fig
+
+
+def line_figure(df, x, y, title=None):
+    """
+    Point-level line chart drawn with WebGL
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Scattergl(x=df[x].to_numpy(), y=df[y].to_numpy(), mode='lines'))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    return fig
+
+
+def radar_figure(values, name='Performance'):
+    """
+    Closed radar chart of `{category: value}` on a 0-1 scale
+    """
+    import plotly.graph_objects as go
+
+    categories = list(values)
+    radii = list(values.values())
+    # Repeat the first point to close the shape
+    fig = go.Figure(go.Scatterpolar(r=radii + radii[:1], theta=categories + categories[:1],
+                                    fill='toself', name=name))
+    fig.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 1])), showlegend=False)
+    return fig
@@ -0,0 +1,198 @@
+"""
+Command-line batch analysis of performance CSVs, without Streamlit.
+
+    python -m performance_tracker data/ q3.csv --output-dir reports --workers 4
+
+Each file is handled in its own worker process. Workers share the on-disk
+dataset and Gemini response caches with the app, so files (and prompts) that
+were already analyzed there, or in an earlier run, are not parsed or sent to
+the model again. For every input a directory is written under the output
+directory with:
+
+- ``schema.json``: detected employee ID column, metrics and memory report
+- ``summary.csv``: count, mean, std, min, quartiles and max per metric
+- ``team_insights.md`` / ``improvement_plan.md``: the team reports
+- ``employee_analyses.jsonl``: one analysis per employee (``--employees``)
+- ``report.json``: what was produced, timings and any errors
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from performance_tracker import engine
+from performance_tracker.ai import configure, generate_insight
+from performance_tracker.ai_cache import ResponseCache
+from performance_tracker.batch import RateLimiter
+from performance_tracker.config import CACHE_DIR
+from performance_tracker.dataset_cache import DatasetCache
+from performance_tracker.prompts import DEFAULT_EMPLOYEES_PER_REQUEST
+
+API_KEY_ENV = "GEMINI_API_KEY"
+
+# Per-process caches, opened once by the pool initializer
+_dataset_cache = None
+_response_cache = None
+
+
+def init_worker(cache_dir, api_key=None):
+    """
+    Open the shared caches and configure Gemini once in each worker process
+    """
+    global _dataset_cache, _response_cache
+    _dataset_cache = DatasetCache(cache_dir)
+    _response_cache = ResponseCache(cache_dir)
+    if api_key:
+        configure(api_key)
+
+
+def find_csv_files(paths):
+    """
+    Expand directories to the CSV files they contain, keeping the given order
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if name.lower().endswith('.csv'))
+        else:
+            files.append(path)
+    return list(dict.fromkeys(os.path.abspath(path) for path in files))
+
+
+def output_names(files):
+    """
+    A distinct output directory name per file, based on its file name
+    """
+    names, seen = {}, {}
+    for path in files:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        seen[stem] = seen.get(stem, 0) + 1
+        names[path] = stem if seen[stem] == 1 else f"{stem}_{seen[stem]}"
+    return names
+
+
+def process_file(path, output_dir, ai=True, employees=False, concurrency=4, rate_per_minute=60,
+                 per_request=DEFAULT_EMPLOYEES_PER_REQUEST):
+    """
+    Analyze one CSV and write its outputs to `output_dir`; returns the run report
+    """
+    started = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    report = {'file': path, 'output_dir': output_dir, 'outputs': [], 'errors': []}
+
+    dataset = engine.load_csv(path, _dataset_cache)
+    report['dataset_key'] = dataset.key
+    report['rows'] = len(dataset.df)
+
+    _write_json(os.path.join(output_dir, 'schema.json'), {
+        key: dataset.schema.get(key) for key in ('employee_id_col', 'metrics', 'metric_groups', 'memory')
+    })
+    report['outputs'].append('schema.json')
+    engine.summary_stats(dataset).to_frame().to_csv(os.path.join(output_dir, 'summary.csv'))
+    report['outputs'].append('summary.csv')
+
+    if ai:
+        limiter = RateLimiter(rate_per_minute)
+        for name, prompt in engine.team_report_prompts(dataset).items():
+            title = engine.TEAM_REPORTS[name][0]
+            try:
+                text = generate_insight(prompt, cache=_response_cache, rate_limiter=limiter)
+            except Exception as e:
+                report['errors'].append(f"{name}: {e}")
+                continue
+            with open(os.path.join(output_dir, f"{name}.md"), 'w', encoding='utf-8') as f:
+                f.write(f"# {title}\n\n{text}\n")
+            report['outputs'].append(f"{name}.md")
+
+    if ai and employees and dataset.employee_id_col:
+        analyzed = 0
+        with open(os.path.join(output_dir, 'employee_analyses.jsonl'), 'w', encoding='utf-8') as f:
+            for result in engine.analyze_all_employees(dataset, concurrency=concurrency,
+                                                       rate_per_minute=rate_per_minute, cache=_response_cache,
+                                                       per_request=per_request):
+                record = {'employee_id': str(result.item)}
+                if result.ok:
+                    record['analysis'] = result.value
+                    analyzed += 1
+                else:
+                    record['error'] = str(result.error)
+                    report['errors'].append(f"employee {result.item}: {result.error}")
+                f.write(json.dumps(record) + "\n")
+        report['employees_analyzed'] = analyzed
+        report['outputs'].append('employee_analyses.jsonl')
+
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    _write_json(os.path.join(output_dir, 'report.json'), report)
+    return report
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m performance_tracker",
+        description="Analyze employee performance CSVs without the web app.",
+    )
+    parser.add_argument('paths', nargs='+', help="CSV files or directories containing them")
+    parser.add_argument('-o', '--output-dir', default='performance_reports',
+                        help="directory to write one report folder per input (default: %(default)s)")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="worker processes, one file each at a time (default: CPU count)")
+    parser.add_argument('--no-ai', action='store_true', help="skip all Gemini calls")
+    parser.add_argument('--employees', action='store_true',
+                        help="also analyze every employee individually")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="concurrent Gemini requests per worker (default: %(default)s)")
+    parser.add_argument('--per-request', type=int, default=DEFAULT_EMPLOYEES_PER_REQUEST,
+                        help="employees packed into one Gemini request (default: %(default)s)")
+    parser.add_argument('--rate-per-minute', type=float, default=60,
+                        help="Gemini requests per minute across all workers (default: %(default)s)")
+    parser.add_argument('--cache-dir', default=CACHE_DIR,
+                        help="shared dataset and response cache directory (default: %(default)s)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    files = find_csv_files(args.paths)
+    if not files:
+        print("No CSV files found.", file=sys.stderr)
+        return 2
+
+    api_key = os.environ.get(API_KEY_ENV)
+    ai = not args.no_ai
+    if ai and not api_key:
+        print(f"{API_KEY_ENV} is not set; only previously cached AI insights can be reused.", file=sys.stderr)
+
+    workers = max(1, min(args.workers, len(files)))
+    # The API quota is shared, so each worker gets its slice of the overall rate
+    rate_per_worker = args.rate_per_minute / workers
+    names = output_names(files)
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(args.cache_dir, api_key)) as pool:
+        futures = {
+            pool.submit(process_file, path, os.path.join(args.output_dir, names[path]), ai,
+                        args.employees, args.concurrency, rate_per_worker, args.per_request): path
+            for path in files
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                report = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"FAILED {path}: {e}", file=sys.stderr)
+                continue
+            status = "done" if not report['errors'] else f"done with {len(report['errors'])} errors"
+            print(f"{status}: {path} -> {report['output_dir']} "
+                  f"({report['rows']:,} rows, {report['seconds']:.1f}s)")
+            failed += bool(report['errors'])
+    return 1 if failed else 0
+
+
+def _write_json(path, obj):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, indent=2, default=str)
@@ -0,0 +1,17 @@
+"""
+Shared configuration for the Performance Tracker helpers.
+"""
+import os
+
+# Root directory for on-disk caches (datasets, AI responses, exports)
+CACHE_DIR = os.environ.get(
+    "PERFORMANCE_TRACKER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "performance_tracker"),
+)
+
+# Prometheus text file rewritten after every app rerun, if set
+METRICS_FILE = os.environ.get("PERFORMANCE_TRACKER_METRICS_FILE")
+
+# Port for a local /metrics HTTP endpoint, if set
+METRICS_PORT = int(os.environ["PERFORMANCE_TRACKER_METRICS_PORT"]) if os.environ.get(
+    "PERFORMANCE_TRACKER_METRICS_PORT") else None
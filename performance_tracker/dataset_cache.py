@@ -0,0 +1,235 @@
+"""
+Content-hashed dataset cache shared across Streamlit reruns.
+
+Uploaded files are keyed on a SHA-256 of their raw bytes. The cleaned frame is
+kept in memory for fast reruns and persisted to local disk (Parquet when
+pyarrow is installed, pickle otherwise) together with the detected schema, so
+a restarted server can skip re-parsing as well. Both tiers are LRU-evicted
+against a byte budget. Disk entries written by another `CACHE_VERSION` are
+treated as misses.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from performance_tracker.config import CACHE_DIR
+from performance_tracker.instrumentation import record_cache_lookup
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Bump whenever cleaning, dtypes or schema detection change what a load produces
+CACHE_VERSION = 4
+
+
+class Dataset:
+    """
+    A cleaned dataframe together with the schema detected for it
+    """
+
+    def __init__(self, key, df, schema):
+        self.key = key
+        self.df = df
+        self.schema = schema
+        self._derived = {}
+        self._derived_lock = threading.RLock()
+
+    def cached(self, name, builder):
+        """
+        Memoize a structure derived from this dataset (ranges, indexes, ...)
+        """
+        with self._derived_lock:
+            if name not in self._derived:
+                record_cache_lookup('derived', 'miss')
+                self._derived[name] = builder()
+            else:
+                record_cache_lookup('derived', 'memory')
+            return self._derived[name]
+
+    @property
+    def employee_id_col(self):
+        return self.schema.get("employee_id_col")
+
+    @property
+    def metrics(self):
+        return self.schema.get("metrics", {})
+
+    @property
+    def nbytes(self):
+        return int(self.df.memory_usage(deep=True).sum())
+
+
+def hash_bytes(data):
+    """
+    Return the cache key for a raw upload
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+class DatasetCache:
+    """
+    Two-tier (memory + disk) LRU cache of cleaned datasets
+    """
+
+    def __init__(self, cache_dir=None, max_memory_bytes=1024 * 1024 * 1024,
+                 max_disk_bytes=2 * 1024 * 1024 * 1024):
+        self.cache_dir = os.path.join(cache_dir or CACHE_DIR, "datasets")
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._memory_sizes = {}
+        self._lock = threading.RLock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get_or_load(self, data, loader):
+        """
+        Return the cached dataset for `data`, calling `loader(data)` on a miss.
+
+        `loader` must return a `(df, schema)` tuple.
+        """
+        key = hash_bytes(data)
+        dataset = self.get(key)
+        if dataset is None:
+            df, schema = loader(data)
+            dataset = self.put(key, df, schema)
+        return dataset
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                record_cache_lookup('datasets', 'memory')
+                return self._memory[key]
+
+        dataset = self._read_disk(key)
+        if dataset is not None:
+            self._remember(dataset)
+        record_cache_lookup('datasets', 'miss' if dataset is None else 'disk')
+        return dataset
+
+    def put(self, key, df, schema):
+        dataset = Dataset(key, df, schema)
+        self._remember(dataset)
+        self._write_disk(dataset)
+        return dataset
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_sizes.clear()
+            for name in os.listdir(self.cache_dir):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    # Memory tier
+
+    def _remember(self, dataset):
+        size = dataset.nbytes
+        with self._lock:
+            self._memory[dataset.key] = dataset
+            self._memory_sizes[dataset.key] = size
+            self._memory.move_to_end(dataset.key)
+            # Always keep the most recent entry, even if it alone exceeds the budget
+            while len(self._memory) > 1 and sum(self._memory_sizes.values()) > self.max_memory_bytes:
+                old_key, _ = self._memory.popitem(last=False)
+                del self._memory_sizes[old_key]
+
+    # Disk tier
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".json", base + ".parquet", base + ".pkl"
+
+    def _read_disk(self, key):
+        schema_path, parquet_path, pickle_path = self._paths(key)
+        if not os.path.exists(schema_path):
+            return None
+        try:
+            with open(schema_path) as f:
+                schema = json.load(f)
+            if schema.get("version") != CACHE_VERSION:
+                # Written by an older loader; reload it rather than serve stale dtypes or schema
+                return None
+            if schema.get("format") == "parquet" and PARQUET_AVAILABLE:
+                data_path = parquet_path
+                df = pd.read_parquet(data_path)
+            elif schema.get("format") == "pickle":
+                data_path = pickle_path
+                df = pd.read_pickle(data_path)
+            else:
+                return None
+        except (OSError, ValueError):
+            # Corrupt or half-written entry; treat it as a miss
+            return None
+
+        # Touch the files so disk eviction sees them as recently used
+        for path in (schema_path, data_path):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        schema.pop("format", None)
+        schema.pop("version", None)
+        return Dataset(key, df, schema)
+
+    def _write_disk(self, dataset):
+        schema_path, parquet_path, pickle_path = self._paths(dataset.key)
+        schema = dict(dataset.schema, version=CACHE_VERSION)
+        try:
+            if not PARQUET_AVAILABLE:
+                raise ImportError("pyarrow is not installed")
+            _atomic_write(parquet_path, lambda tmp: dataset.df.to_parquet(tmp, index=False))
+            schema["format"] = "parquet"
+        except Exception:
+            # Mixed-type object columns can't always be stored as Parquet
+            try:
+                _atomic_write(pickle_path, lambda tmp: dataset.df.to_pickle(tmp))
+            except OSError:
+                return
+            schema["format"] = "pickle"
+        _atomic_write(schema_path, lambda tmp: _dump_json(schema, tmp))
+        self._evict_disk()
+
+    def _evict_disk(self):
+        with self._lock:
+            entries = {}
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                key = name.split(".", 1)[0]
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                size, mtime = entries.get(key, (0, 0))
+                entries[key] = (size + stat.st_size, max(mtime, stat.st_mtime))
+
+            total = sum(size for size, _ in entries.values())
+            for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+                if total <= self.max_disk_bytes or len(entries) <= 1:
+                    break
+                for path in self._paths(key):
+                    if os.path.exists(path):
+                        os.remove(path)
+                total -= size
+                del entries[key]
+
+
+def _dump_json(obj, path):
+    with open(path, "w") as f:
+        json.dump(obj, f)
+
+
+def _atomic_write(path, writer):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        writer(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
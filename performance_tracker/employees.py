@@ -0,0 +1,58 @@
+"""
+Per-employee lookup index built once per dataset.
+
+Rows are grouped by employee ID a single time, so finding an employee (or all
+of their periods in multi-month data) is a dict lookup instead of a boolean
+scan over the frame. Metric values normalized against the team maximum are
+precomputed for the whole frame, which is what the radar chart plots.
+"""
+import numpy as np
+
+
+class EmployeeIndex:
+    """
+    Hash index from employee ID to row positions, with normalized metrics
+    """
+
+    def __init__(self, df, id_col, metrics):
+        self.df = df
+        self.id_col = id_col
+        self.metrics = {metric_type: col for metric_type, col in metrics.items() if col in df.columns}
+
+        # groupby(...).indices maps each ID to its row positions in frame order
+        self._positions = df.groupby(id_col, sort=False, observed=True, dropna=True).indices
+        self.ids = list(self._positions)
+
+        # Normalize each metric column by its team-wide maximum once
+        metric_cols = list(dict.fromkeys(self.metrics.values()))
+        values = df[metric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        maxima = np.nanmax(values, axis=0) if len(df) else np.zeros(len(metric_cols))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self._normalized = np.where(maxima != 0, values / maxima, 0.0)
+        self._metric_pos = {col: i for i, col in enumerate(metric_cols)}
+
+    def __contains__(self, employee_id):
+        return employee_id in self._positions
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows(self, employee_id):
+        """
+        All rows for an employee (one per period in multi-period data)
+        """
+        return self.df.iloc[self._positions[employee_id]]
+
+    def details(self, employee_id, columns):
+        """
+        Selected fields from the employee's first row
+        """
+        first = self._positions[employee_id][0]
+        return {col: self.df[col].iat[first] for col in columns}
+
+    def normalized_metrics(self, employee_id):
+        """
+        Metric values from the employee's first row divided by the team maximum
+        """
+        row = self._normalized[self._positions[employee_id][0]]
+        return {metric_type: float(row[self._metric_pos[col]]) for metric_type, col in self.metrics.items()}
@@ -0,0 +1,253 @@
+"""
+Headless analytics engine behind the Streamlit app and the command line.
+
+Everything here works without Streamlit: loading and cleaning a CSV into a
+cached `Dataset`, the per-dataset structures derived from it (employee index,
+summary statistics, history, team table, rollups), prompt construction, and the Gemini
+calls for team reports and employee analyses. The app and `python -m
+performance_tracker` are both thin layers over these functions and share the
+same on-disk dataset and response caches.
+"""
+from io import BytesIO
+
+from performance_tracker import prompts
+from performance_tracker.ai import DEFAULT_MODEL, generate_insight
+from performance_tracker.ai_cache import prompt_key
+from performance_tracker.batch import BatchResult, RateLimiter, run_batch
+from performance_tracker.employees import EmployeeIndex
+from performance_tracker.history import HistoryStore, build_periods
+from performance_tracker.ingestion import read_csv_chunked
+from performance_tracker.rollups import RollupCube
+from performance_tracker.schema import (
+    detect_employee_id_column,
+    extract_performance_metrics,
+    infer_metric_columns,
+)
+from performance_tracker.summary import SummaryStats
+from performance_tracker.tables import TeamTable
+
+
+# Loading
+
+def prepare_dataset(data_bytes):
+    """
+    Parse raw CSV bytes into a cleaned dataframe plus its detected schema
+    """
+    # Read in chunks with downcast numerics and categorical string columns
+    df, memory = read_csv_chunked(BytesIO(data_bytes))
+
+    # Basic data cleaning
+    # Convert column names to lowercase and replace spaces with underscores
+    df.columns = [col.lower().replace(' ', '_') for col in df.columns]
+
+    # Try to identify employee ID column
+    employee_id_col = detect_employee_id_column(df.columns)
+
+    if employee_id_col:
+        df.rename(columns={employee_id_col: 'employee_id'}, inplace=True)
+        employee_id_col = 'employee_id'
+
+    schema = {
+        'employee_id_col': employee_id_col,
+        'metrics': extract_performance_metrics(df),
+        'metric_groups': infer_metric_columns(df),
+        'memory': memory,
+    }
+    return df, schema
+
+
+def load_dataset(data_bytes, dataset_cache):
+    """
+    Return the cached `Dataset` for raw CSV bytes, parsing them on a miss
+    """
+    return dataset_cache.get_or_load(data_bytes, prepare_dataset)
+
+
+def load_csv(path, dataset_cache):
+    """
+    Return the cached `Dataset` for a CSV file on disk
+    """
+    with open(path, 'rb') as f:
+        return load_dataset(f.read(), dataset_cache)
+
+
+# Structures derived once per dataset
+
+def employee_index(dataset):
+    return dataset.cached(
+        'employee_index',
+        lambda: EmployeeIndex(dataset.df, dataset.employee_id_col, dataset.metrics)
+    )
+
+
+def summary_stats(dataset):
+    return dataset.cached(
+        'summary_stats',
+        lambda: SummaryStats(dataset.df, dataset.metrics.values())
+    )
+
+
+def history_store(dataset):
+    """
+    The per-period history store, or None when the data has no usable time column
+    """
+    def build():
+        periods = build_periods(dataset.df)
+        if periods is None:
+            return None
+        return HistoryStore(dataset.df, dataset.employee_id_col, dataset.metrics, periods)
+    return dataset.cached('history_store', build)
+
+
+def team_table(dataset):
+    return dataset.cached('team_table', lambda: TeamTable(dataset.df))
+
+
+def rollup_cube(dataset):
+    """
+    Rollups by department, manager, role and month, aggregated once for this dataset
+    """
+    def build():
+        periods = build_periods(dataset.df)
+        if periods is not None:
+            # Daily dates would make a rollup per day; the breakdown works in months
+            periods = periods.dt.to_period('M').dt.to_timestamp()
+        return RollupCube(dataset.df, dataset.metrics, dataset.employee_id_col, periods)
+    return dataset.cached('rollup_cube', build)
+
+
+# Prompts
+
+def team_context(dataset):
+    """
+    The compact team statistics block shared by every prompt for this dataset
+    """
+    def build():
+        employees = len(employee_index(dataset)) if dataset.employee_id_col else None
+        context = prompts.team_context(summary_stats(dataset), dataset.metrics, len(dataset.df), employees)
+        cube = rollup_cube(dataset)
+        if not cube.levels:
+            return context
+        # Attainment stands in for the means of its own columns
+        paired = {col for pair in cube.attainment.values() for col in pair}
+        metric_cols = [col for col in cube.metric_cols if col not in paired]
+        return context + "\n" + prompts.breakdown_block(cube.drill(), cube.levels[0], metric_cols,
+                                                         list(cube.attainment))
+    return dataset.cached('team_context', build)
+
+
+def prompt_fields(dataset):
+    """
+    Columns sent to the model for each employee, most relevant first
+    """
+    return dataset.cached('prompt_fields', lambda: prompts.employee_fields(
+        dataset.df.columns, dataset.metrics, dataset.schema.get('metric_groups'), dataset.employee_id_col))
+
+
+def build_team_prompt(dataset):
+    return prompts.team_prompt(team_context(dataset))
+
+
+def build_question_prompt(dataset, question):
+    return prompts.question_prompt(team_context(dataset), dataset.df.columns, question)
+
+
+def build_improvement_prompt(dataset):
+    return prompts.improvement_prompt(team_context(dataset))
+
+
+def employee_record(dataset, employee_id):
+    """
+    The prompt fields of an employee's first row
+    """
+    return employee_index(dataset).details(employee_id, prompt_fields(dataset))
+
+
+def build_employee_prompt(dataset, employee_id, budget=prompts.DEFAULT_TOKEN_BUDGET):
+    """
+    Create the Gemini prompt used to analyze a single employee
+    """
+    return prompts.employee_prompt(employee_id, employee_record(dataset, employee_id),
+                                   team_context(dataset), budget)
+
+
+# Team-level reports, keyed by the name used for jobs and output files
+TEAM_REPORTS = {
+    'team_insights': ("Team Performance Insights", build_team_prompt),
+    'improvement_plan': ("Team Performance Improvement Plan", build_improvement_prompt),
+}
+
+
+def team_report_prompts(dataset):
+    """
+    Map each team report name to its prompt for this dataset
+    """
+    return {name: build(dataset) for name, (_, build) in TEAM_REPORTS.items()}
+
+
+# AI analyses
+
+def cached_team_reports(dataset, cache, model_name=DEFAULT_MODEL):
+    """
+    Team reports already in the response cache, keyed by title; nothing is generated
+    """
+    reports = {}
+    for name, prompt in team_report_prompts(dataset).items():
+        text = cache.get(prompt_key(model_name, prompt))
+        if text is not None:
+            reports[TEAM_REPORTS[name][0]] = text
+    return reports
+
+
+def analyze_all_employees(dataset, employee_ids=None, concurrency=4, rate_per_minute=60, cache=None,
+                          per_request=prompts.DEFAULT_EMPLOYEES_PER_REQUEST):
+    """
+    Analyze employees concurrently, yielding a `BatchResult` per employee as each finishes.
+
+    Employees whose analysis is already cached are yielded first. The rest are
+    packed up to `per_request` to a Gemini call; each answer split out of a
+    batched response is cached under the employee's own prompt, so later
+    single-employee views reuse it. Employees missing from a batched response
+    are analyzed individually.
+    """
+    employee_ids = employee_index(dataset).ids if employee_ids is None else employee_ids
+    context = team_context(dataset)
+    limiter = RateLimiter(rate_per_minute)
+
+    line_budget = prompts.employee_line_budget(context)
+
+    single_prompts = {}
+    lines = []
+    for employee_id in employee_ids:
+        record = employee_record(dataset, employee_id)
+        prompt = prompts.employee_prompt(employee_id, record, context)
+        cached = cache.get(prompt_key(DEFAULT_MODEL, prompt)) if cache is not None else None
+        if cached is not None:
+            yield BatchResult(employee_id, cached)
+            continue
+        single_prompts[employee_id] = prompt
+        lines.append((employee_id, prompts.employee_line(employee_id, record, line_budget)))
+
+    def analyze(batch):
+        ids = [employee_id for employee_id, _ in batch]
+        if len(ids) == 1:
+            return {ids[0]: generate_insight(single_prompts[ids[0]], cache=cache, rate_limiter=limiter)}
+        response = generate_insight(prompts.batch_prompt([line for _, line in batch], context),
+                                    cache=cache, rate_limiter=limiter)
+        answers = prompts.split_batch_response(response, ids)
+        for employee_id in ids:
+            if employee_id in answers:
+                if cache is not None:
+                    cache.put(prompt_key(DEFAULT_MODEL, single_prompts[employee_id]), answers[employee_id])
+            else:
+                answers[employee_id] = generate_insight(single_prompts[employee_id], cache=cache,
+                                                        rate_limiter=limiter)
+        return answers
+
+    batches = prompts.pack_employees(lines, context, max_per_request=max(1, per_request))
+    for result in run_batch(batches, analyze, concurrency=concurrency):
+        for employee_id, _ in result.item:
+            if result.ok:
+                yield BatchResult(employee_id, result.value[employee_id], attempts=result.attempts)
+            else:
+                yield BatchResult(employee_id, error=result.error, attempts=result.attempts)
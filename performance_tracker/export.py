@@ -0,0 +1,149 @@
+"""
+Export of the team data together with the AI insights generated for it.
+
+Artifacts are written straight to files in the cache directory (CSV is
+streamed chunk by chunk, optionally gzip-compressed; Excel and Parquet are
+binary) and reused for as long as the dataset and the included insights are
+unchanged, so repeated downloads don't re-serialize the frame. CSV carries no
+insights, so its artifacts depend on the dataset alone.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+from performance_tracker.config import CACHE_DIR
+from performance_tracker.instrumentation import record_cache_lookup
+
+CSV_CHUNKSIZE = 50_000
+# Rows per worksheet, including the header row
+EXCEL_MAX_ROWS = 1_048_576
+
+# `insights`: whether the file embeds the AI insights next to the data
+FORMATS = {
+    'CSV': {'extension': 'csv', 'mime': 'text/csv', 'insights': False},
+    'CSV (gzip)': {'extension': 'csv.gz', 'mime': 'application/gzip', 'insights': False},
+    'Excel': {'extension': 'xlsx', 'insights': True,
+              'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'},
+    'Parquet': {'extension': 'parquet', 'mime': 'application/vnd.apache.parquet', 'insights': True},
+}
+
+
+def write_csv(df, path, compress=False, chunksize=CSV_CHUNKSIZE):
+    """
+    Stream `df` to a CSV file chunk by chunk
+    """
+    opener = gzip.open if compress else open
+    with opener(path, 'wt', newline='', encoding='utf-8') as f:
+        if df.empty:
+            df.to_csv(f, index=False)
+        for start in range(0, len(df), chunksize):
+            df.iloc[start:start + chunksize].to_csv(f, index=False, header=start == 0)
+
+
+def write_excel(df, path, insights=None, employee_analyses=None):
+    """
+    Write the data plus insight sheets to an .xlsx file
+    """
+    # Fail before serializing anything rather than partway through the sheet
+    if len(df) >= EXCEL_MAX_ROWS:
+        raise ValueError(f"{len(df):,} rows exceed Excel's limit of {EXCEL_MAX_ROWS - 1:,} per sheet")
+    with pd.ExcelWriter(path, engine='xlsxwriter') as writer:
+        df.to_excel(writer, sheet_name='Performance Data', index=False)
+        if insights:
+            pd.DataFrame(list(insights.items()), columns=['Insight', 'Text']) \
+                .to_excel(writer, sheet_name='AI Insights', index=False)
+        if employee_analyses:
+            pd.DataFrame([(str(k), v) for k, v in employee_analyses.items()],
+                         columns=['Employee ID', 'Analysis']) \
+                .to_excel(writer, sheet_name='Employee Analyses', index=False)
+
+
+def write_parquet(df, path, insights=None, employee_analyses=None):
+    """
+    Write the data to Parquet, carrying the insights in the file metadata
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'ai_insights'] = json.dumps(insights or {}).encode('utf-8')
+    metadata[b'employee_analyses'] = json.dumps(
+        {str(k): v for k, v in (employee_analyses or {}).items()}).encode('utf-8')
+    pq.write_table(table.replace_schema_metadata(metadata), path)
+
+
+def insights_markdown(insights=None, employee_analyses=None):
+    """
+    The insights as a Markdown document, for exports without room for them
+    """
+    sections = [f"## {title}\n\n{text}" for title, text in (insights or {}).items()]
+    sections += [f"## Employee {employee_id}\n\n{text}"
+                 for employee_id, text in (employee_analyses or {}).items()]
+    return "\n\n".join(sections) + "\n"
+
+
+class ExportCache:
+    """
+    Export artifacts on disk, keyed by dataset, format and included insights
+    """
+
+    def __init__(self, cache_dir=None, max_disk_bytes=1024 * 1024 * 1024):
+        self.cache_dir = os.path.join(cache_dir or CACHE_DIR, "exports")
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get_or_build(self, dataset_key, export_format, df, insights=None, employee_analyses=None):
+        """
+        Return the path of the artifact, writing it only if it isn't cached yet
+        """
+        extension = FORMATS[export_format]['extension']
+        if not FORMATS[export_format]['insights']:
+            # New insights must not force the data to be written again
+            insights = employee_analyses = None
+        content = json.dumps([export_format, insights or {},
+                              {str(k): v for k, v in (employee_analyses or {}).items()}], sort_keys=True)
+        digest = hashlib.sha256(f"{dataset_key}\0{content}".encode('utf-8')).hexdigest()[:32]
+        path = os.path.join(self.cache_dir, f"{digest}.{extension}")
+
+        with self._lock:
+            if os.path.exists(path):
+                os.utime(path)
+                record_cache_lookup('exports', 'disk')
+                return path
+            record_cache_lookup('exports', 'miss')
+
+            # Writers pick their format from the extension, so keep it last
+            tmp = os.path.join(self.cache_dir, f"{digest}.{os.getpid()}.tmp.{extension}")
+            try:
+                if export_format == 'CSV':
+                    write_csv(df, tmp)
+                elif export_format == 'CSV (gzip)':
+                    write_csv(df, tmp, compress=True)
+                elif export_format == 'Excel':
+                    write_excel(df, tmp, insights, employee_analyses)
+                else:
+                    write_parquet(df, tmp, insights, employee_analyses)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            self._evict(keep=path)
+        return path
+
+    def _evict(self, keep):
+        paths = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                 if '.tmp.' not in name]
+        paths.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(path) for path in paths)
+        for path in paths:
+            if total <= self.max_disk_bytes:
+                break
+            if path != keep:
+                total -= os.path.getsize(path)
+                os.remove(path)
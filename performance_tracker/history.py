@@ -0,0 +1,157 @@
+"""
+Time-indexed performance history for the Historical Performance charts.
+
+A sortable period is derived once per dataset from the date/period/month/
+year/quarter columns. Team and department averages per period are
+aggregated up front, and any series handed to a chart is downsampled with
+Largest-Triangle-Three-Buckets (LTTB), so chart payloads stay bounded no
+matter how many periods or employees the data covers.
+"""
+import numpy as np
+import pandas as pd
+
+TIME_COLUMNS = ['date', 'period', 'month', 'quarter']
+DEFAULT_MAX_POINTS = 500
+
+_MONTHS = {}
+for _number, (_full, _short) in enumerate(zip(
+        ['january', 'february', 'march', 'april', 'may', 'june', 'july',
+         'august', 'september', 'october', 'november', 'december'],
+        ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']), start=1):
+    _MONTHS[_full] = _MONTHS[_short] = _MONTHS[str(_number)] = _MONTHS[f"{_number:02d}"] = _number
+
+
+def find_time_column(columns):
+    """
+    Return the first column usable as a time axis, or None
+    """
+    return next((col for col in columns if col in TIME_COLUMNS), None)
+
+
+def build_periods(df):
+    """
+    Derive a datetime period for every row, or None if the data has no time columns
+    """
+    if 'date' in df.columns:
+        periods = pd.to_datetime(df['date'], errors='coerce')
+        if periods.notna().any():
+            return periods
+    if 'period' in df.columns:
+        periods = pd.to_datetime(df['period'], errors='coerce')
+        if periods.notna().any():
+            return periods
+
+    year = df['year'] if 'year' in df.columns else pd.Series(2000, index=df.index)
+    year = pd.to_numeric(np.asarray(year), errors='coerce')
+    if 'month' in df.columns:
+        month = _lookup(df['month'], lambda value: _MONTHS.get(str(value).strip().lower()))
+    elif 'quarter' in df.columns:
+        month = _lookup(df['quarter'], _quarter_start_month)
+    else:
+        return None
+
+    periods = pd.to_datetime(pd.DataFrame({'year': year, 'month': month, 'day': 1}, index=df.index),
+                             errors='coerce')
+    return periods if periods.notna().any() else None
+
+
+def lttb(x, y, threshold):
+    """
+    Downsample a series to `threshold` points with Largest-Triangle-Three-Buckets
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    xs = _as_float(x)
+    ys = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = xs[next_start:next_end].mean()
+        avg_y = ys[next_start:next_end].mean()
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        areas = np.abs((xs[a] - avg_x) * (ys[start:end] - ys[a])
+                       - (xs[a] - xs[start:end]) * (avg_y - ys[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return x[selected], y[selected]
+
+
+class HistoryStore:
+    """
+    Per-period team, department and employee series for the metric columns
+    """
+
+    def __init__(self, df, id_col, metrics, periods, department_col='department'):
+        self.metric_cols = [col for col in dict.fromkeys(metrics.values()) if col in df.columns]
+        self.id_col = id_col
+        self.department_col = department_col if department_col in df.columns else None
+
+        keys = [col for col in (id_col, self.department_col) if col]
+        frame = df[keys + self.metric_cols].assign(_period=periods.to_numpy())
+        frame = frame[frame['_period'].notna()].sort_values('_period', kind='stable')
+        self._frame = frame
+
+        # Aggregates are computed once; only the requested series is sliced later
+        self.team = frame.groupby('_period')[self.metric_cols].mean()
+        self.departments = (frame.groupby([self.department_col, '_period'], observed=True)[self.metric_cols].mean()
+                            if self.department_col else None)
+        self._employee_positions = (frame.groupby(id_col, sort=False, observed=True).indices
+                                    if id_col else {})
+
+    def team_series(self, col, max_points=DEFAULT_MAX_POINTS):
+        return self._downsample(self.team[col], max_points)
+
+    def department_series(self, department, col, max_points=DEFAULT_MAX_POINTS):
+        if self.departments is None or department not in self.departments.index.get_level_values(0):
+            return None
+        return self._downsample(self.departments.loc[department][col], max_points)
+
+    def employee_series(self, employee_id, col, max_points=DEFAULT_MAX_POINTS):
+        positions = self._employee_positions.get(employee_id)
+        if positions is None:
+            return None
+        rows = self._frame.iloc[positions]
+        # Several rows in the same period (e.g. multiple reviews) are averaged
+        return self._downsample(rows.groupby('_period')[col].mean(), max_points)
+
+    def employee_department(self, employee_id):
+        positions = self._employee_positions.get(employee_id)
+        if positions is None or self.department_col is None:
+            return None
+        return self._frame[self.department_col].iat[positions[-1]]
+
+    @staticmethod
+    def _downsample(series, max_points):
+        series = series.dropna()
+        x, y = lttb(series.index.to_numpy(), series.to_numpy(dtype=np.float64), max_points)
+        return x, y
+
+
+def _lookup(series, func):
+    # Map each distinct value once; categoricals map their categories only
+    mapping = {value: func(value) for value in pd.unique(series.dropna())}
+    return pd.to_numeric(series.map(mapping).astype(object), errors='coerce').to_numpy()
+
+
+def _quarter_start_month(value):
+    digits = ''.join(ch for ch in str(value) if ch.isdigit())
+    if digits and 1 <= int(digits[-1]) <= 4:
+        return (int(digits[-1]) - 1) * 3 + 1
+    return None
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
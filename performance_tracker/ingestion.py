@@ -0,0 +1,158 @@
+"""
+Chunked, memory-bounded CSV ingestion.
+
+Files are read `chunksize` rows at a time so the fully-typed object/int64/
+float64 frame never exists in memory at once. Each chunk is shrunk as it
+arrives: integers are downcast to the smallest type that holds them, floats
+are downcast to float32 only when that is lossless, and low-cardinality string
+columns (department, role, manager_id, month, ...) become categoricals.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 50_000
+
+# A string column becomes categorical when it has at most this share of
+# distinct values (and no more than CATEGORY_MAX_UNIQUE of them)
+CATEGORY_MAX_RATIO = 0.5
+CATEGORY_MAX_UNIQUE = 10_000
+
+
+def read_csv_chunked(source, chunksize=DEFAULT_CHUNKSIZE, **read_csv_kwargs):
+    """
+    Read a CSV in chunks and return `(df, report)`.
+
+    `source` is a path or a seekable file: the categorical columns are picked
+    from a first sample of rows, then the file is read again from the start
+    with those columns kept as text, so a later chunk where one is blank or
+    looks numeric still yields the same labels. `report` describes the
+    resulting memory footprint (see `memory_report`).
+    """
+    start = source.tell() if hasattr(source, "seek") else None
+    sample = pd.read_csv(source, nrows=chunksize, **read_csv_kwargs)
+    category_cols = _category_candidates(sample)
+    del sample
+    if start is not None:
+        source.seek(start)
+
+    dtype = read_csv_kwargs.pop("dtype", None) or {}
+    if isinstance(dtype, dict):
+        dtype = {**{col: str for col in category_cols}, **dtype}
+
+    chunks = []
+    raw_bytes = 0
+    for chunk in pd.read_csv(source, chunksize=chunksize, dtype=dtype, **read_csv_kwargs):
+        raw_bytes += int(chunk.memory_usage(deep=True).sum())
+        chunks.append(optimize_dtypes(chunk, category_cols))
+
+    if not chunks:
+        df = pd.DataFrame()
+        return df, memory_report(df, raw_bytes)
+
+    df = _concat_chunks(chunks, category_cols)
+    # Chunks can disagree on the narrowest type; settle it once on the full frame
+    df = optimize_dtypes(df, [])
+    return df, memory_report(df, raw_bytes)
+
+
+def optimize_dtypes(df, category_cols=None):
+    """
+    Downcast numeric columns and convert `category_cols` to categoricals
+    """
+    if category_cols is None:
+        category_cols = _category_candidates(df)
+
+    converted = {}
+    for col in df.columns:
+        series = df[col]
+        kind = series.dtype.kind
+        if col in category_cols:
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                converted[col] = series.astype("category")
+        elif kind in "iu":
+            converted[col] = pd.to_numeric(series, downcast="integer" if kind == "i" else "unsigned")
+        elif kind == "f":
+            converted[col] = _downcast_float(series)
+
+    return _assign(df, converted) if converted else df
+
+
+def memory_report(df, raw_bytes=None):
+    """
+    Summarize the in-memory size of `df`
+    """
+    memory_bytes = int(df.memory_usage(deep=True).sum())
+    report = {
+        "rows": int(len(df)),
+        "columns": int(len(df.columns)),
+        "memory_bytes": memory_bytes,
+        "category_columns": int(sum(isinstance(dtype, pd.CategoricalDtype) for dtype in df.dtypes)),
+    }
+    if raw_bytes:
+        report["unoptimized_bytes"] = int(raw_bytes)
+        report["saved_ratio"] = round(1 - memory_bytes / raw_bytes, 3)
+    return report
+
+
+def format_bytes(num_bytes):
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024 or unit == "GB":
+            return f"{num_bytes:.1f} {unit}" if unit != "B" else f"{num_bytes} B"
+        num_bytes /= 1024
+
+
+def _category_candidates(df):
+    rows = max(len(df), 1)
+    candidates = []
+    for col in df.columns:
+        series = df[col]
+        if series.dtype.kind not in "OSU" and not pd.api.types.is_string_dtype(series.dtype):
+            continue
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            continue
+        unique = series.nunique(dropna=True)
+        if unique <= CATEGORY_MAX_UNIQUE and unique / rows <= CATEGORY_MAX_RATIO:
+            candidates.append(col)
+    return candidates
+
+
+def _downcast_float(series):
+    values = series.to_numpy()
+    downcast = values.astype(np.float32)
+    # Only keep float32 when every value survives the round trip
+    if np.array_equal(downcast.astype(values.dtype), values, equal_nan=True):
+        return pd.Series(downcast, index=series.index, name=series.name)
+    return series
+
+
+def _concat_chunks(chunks, category_cols):
+    if len(chunks) == 1:
+        return chunks[0]
+
+    # pd.concat falls back to object dtype when chunk categories differ, so
+    # align every chunk to the sorted union of categories first (sorted, as
+    # in a single-chunk load, so category codes order like the labels)
+    for col in category_cols:
+        categories = pd.Index([])
+        for chunk in chunks:
+            categories = categories.union(chunk[col].cat.categories, sort=False)
+        categories = categories.sort_values()
+        for i, chunk in enumerate(chunks):
+            chunks[i] = _assign(chunk, {col: chunk[col].cat.set_categories(categories)})
+
+    df = pd.concat(chunks, ignore_index=True)
+
+    # A column that looked repetitive in the first chunk may not be overall
+    rows = max(len(df), 1)
+    for col in category_cols:
+        unique = len(df[col].cat.categories)
+        if unique > CATEGORY_MAX_UNIQUE or unique / rows > CATEGORY_MAX_RATIO:
+            df[col] = df[col].astype(object)
+    return df
+
+
+def _assign(df, columns):
+    df = df.copy(deep=False)
+    for col, values in columns.items():
+        df[col] = values
+    return df
@@ -0,0 +1,266 @@
+"""
+Process-wide timing, memory and cache metrics for the app's hot paths.
+
+`trace()` wraps one rerun of the app and `stage(name)` one step inside it;
+each stage's wall time and resident-memory change are kept on the current
+trace (for the diagnostics panel) and aggregated in `REGISTRY`. Library code
+reports Gemini latency, prompt/response token sizes and cache lookups to the
+same registry, which renders in the Prometheus text exposition format for a
+textfile collector or the optional HTTP endpoint.
+"""
+import contextvars
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "performance_tracker_"
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+# name: (type, help, buckets)
+METRICS = {
+    'rerun_seconds': ('histogram', "Wall time of one app rerun.", SECONDS_BUCKETS),
+    'stage_seconds': ('histogram', "Wall time of one stage of an app rerun.", SECONDS_BUCKETS),
+    'stage_memory_delta_bytes': ('gauge', "Resident memory change during the last run of a stage.", None),
+    'resident_memory_bytes': ('gauge', "Resident memory of the process at the end of the last rerun.", None),
+    'gemini_request_seconds': ('histogram', "Latency of Gemini calls, to the full response.", SECONDS_BUCKETS),
+    'gemini_first_chunk_seconds': ('histogram', "Latency of streamed Gemini calls to the first chunk.",
+                                   SECONDS_BUCKETS),
+    'gemini_requests_total': ('counter', "Gemini calls by outcome.", None),
+    'gemini_prompt_tokens': ('histogram', "Estimated prompt size of Gemini calls in tokens.", TOKEN_BUCKETS),
+    'gemini_response_tokens': ('histogram', "Estimated response size of Gemini calls in tokens.", TOKEN_BUCKETS),
+    'cache_lookups_total': ('counter', "Cache lookups by cache and result.", None),
+}
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters, gauges and histograms keyed by name and labels
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._values[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        buckets = METRICS[name][2]
+        with self._lock:
+            histogram = self._values.get(key)
+            if histogram is None:
+                histogram = self._values[key] = {'count': 0, 'sum': 0.0, 'buckets': [0] * len(buckets)}
+            histogram['count'] += 1
+            histogram['sum'] += value
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram['buckets'][i] += 1
+
+    def samples(self, name):
+        """
+        `(labels, value)` pairs recorded for `name`; histogram values are dicts
+        """
+        with self._lock:
+            return [(dict(labels), _copy(value)) for (metric, labels), value in self._values.items()
+                    if metric == name]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def to_prometheus(self):
+        """
+        All metrics in the Prometheus text exposition format
+        """
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            series = [(labels, value) for (metric, labels), value in values if metric == name]
+            if not series:
+                continue
+            full_name = PREFIX + name
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for labels, value in series:
+                if kind != 'histogram':
+                    lines.append(f"{full_name}{_labels(labels)} {value}")
+                    continue
+                for bound, count in zip(buckets, value['buckets']):
+                    lines.append(f"{full_name}_bucket{_labels(labels + (('le', bound),))} {count}")
+                lines.append(f"{full_name}_bucket{_labels(labels + (('le', '+Inf'),))} {value['count']}")
+                lines.append(f"{full_name}_sum{_labels(labels)} {value['sum']}")
+                lines.append(f"{full_name}_count{_labels(labels)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def record_cache_lookup(cache, result):
+    """
+    Count a lookup in `cache`; `result` is "miss" or where the hit was served from
+    """
+    REGISTRY.inc('cache_lookups_total', cache=cache, result=result)
+
+
+def cache_hit_rates():
+    """
+    Map each cache to `(lookups, hit rate)`
+    """
+    totals = {}
+    for labels, count in REGISTRY.samples('cache_lookups_total'):
+        lookups, hits = totals.get(labels['cache'], (0, 0))
+        totals[labels['cache']] = (lookups + count, hits + (count if labels['result'] != 'miss' else 0))
+    return {cache: (lookups, hits / lookups if lookups else 0.0) for cache, (lookups, hits) in totals.items()}
+
+
+def histogram_summary(name):
+    """
+    `(count, mean)` of a histogram across all its label sets
+    """
+    count = total = 0
+    for _, value in REGISTRY.samples(name):
+        count += value['count']
+        total += value['sum']
+    return count, (total / count if count else 0.0)
+
+
+def resident_memory_bytes():
+    """
+    Current resident set size of this process, or None where it can't be read
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+# Traces
+
+class Trace:
+    """
+    Stages timed during one run, in the order they finished
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.stages = []
+        self.seconds = None
+        self.memory_bytes = None
+
+
+_current_trace = contextvars.ContextVar('performance_tracker_trace', default=None)
+
+
+@contextmanager
+def trace(name='rerun'):
+    """
+    Collect the stages run inside the block into a new `Trace`
+    """
+    current = Trace(name)
+    token = _current_trace.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    finally:
+        _current_trace.reset(token)
+        current.seconds = time.perf_counter() - started
+        current.memory_bytes = resident_memory_bytes()
+        REGISTRY.observe('rerun_seconds', current.seconds)
+        if current.memory_bytes is not None:
+            REGISTRY.set('resident_memory_bytes', current.memory_bytes)
+
+
+@contextmanager
+def stage(name):
+    """
+    Time one step and record its resident-memory change
+    """
+    memory_before = resident_memory_bytes()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        memory_after = resident_memory_bytes()
+        delta = memory_after - memory_before if memory_before is not None and memory_after is not None else None
+        REGISTRY.observe('stage_seconds', seconds, stage=name)
+        if delta is not None:
+            REGISTRY.set('stage_memory_delta_bytes', delta, stage=name)
+        current = _current_trace.get()
+        if current is not None:
+            current.stages.append((name, seconds, delta))
+
+
+# Exposition
+
+def write_metrics_file(path, registry=REGISTRY):
+    """
+    Atomically write the metrics to `path`, e.g. for a node_exporter textfile collector
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(registry.to_prometheus())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.registry.to_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """
+    Serve /metrics on a daemon thread; returns the server
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+
+def _copy(value):
+    return {**value, 'buckets': list(value['buckets'])} if isinstance(value, dict) else value
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (key + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+               for key, value in labels)
+    return "{" + ",".join(escaped) + "}"
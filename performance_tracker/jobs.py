@@ -0,0 +1,113 @@
+"""
+Background jobs for slow work (AI generations) requested from the UI.
+
+Jobs run on a small thread pool owned by the server process, so the script
+thread never waits on them. Each job has a caller-chosen ID; submitting an ID
+that is already queued, running or done returns the existing job instead of
+starting a duplicate. A job whose function returns a generator of text
+chunks exposes the text received so far as `partial` while it runs.
+"""
+import hashlib
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def job_id_for(*parts):
+    """
+    Build a stable job ID from the values that determine the job's output
+    """
+    return hashlib.sha256("\0".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:16]
+
+
+class Job:
+    """
+    Status and outcome of one background job
+    """
+
+    def __init__(self, job_id, label=None):
+        self.id = job_id
+        self.label = label or job_id
+        self.status = QUEUED
+        self.result = None
+        self.partial = ""
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class JobManager:
+    """
+    Runs jobs on a thread pool and keeps their status for later lookup
+    """
+
+    def __init__(self, max_workers=4, max_jobs=500):
+        self.max_jobs = max_jobs
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job_id, fn, *args, label=None, **kwargs):
+        """
+        Start `fn(*args, **kwargs)` as job `job_id` unless it already exists.
+
+        Failed jobs are replaced, so submitting again retries them.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status != FAILED:
+                return job
+            job = Job(job_id, label)
+            self._jobs[job_id] = job
+            self._prune()
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn, args, kwargs):
+        job.started_at = time.time()
+        job.status = RUNNING
+        try:
+            result = fn(*args, **kwargs)
+            if isinstance(result, types.GeneratorType):
+                # Streamed output; keep what has arrived readable by pollers
+                for chunk in result:
+                    job.partial += chunk
+                result = job.partial
+            job.result = result
+            job.status = DONE
+        except Exception as e:
+            job.error = e
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        # Drop the oldest finished jobs once the table is full
+        excess = len(self._jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        finished = sorted((job for job in self._jobs.values() if job.finished),
+                          key=lambda job: job.finished_at)
+        for job in finished[:excess]:
+            del self._jobs[job.id]
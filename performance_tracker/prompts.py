@@ -0,0 +1,239 @@
+"""
+Gemini prompts built to a token budget.
+
+Every prompt for a dataset starts from the same compact team-context block
+(size, mean, median and range per metric, and a per-department breakdown
+read from the rollup cube), built once per dataset.
+Employee records are reduced to the fields that matter for an analysis:
+the detected metric columns first, then descriptive columns such as
+department and role. Fields are dropped, least relevant first, until a
+prompt fits its budget.
+
+Several employees can be packed into one request. The model is asked to
+start each employee's answer with a marker line, and the response is split
+back into one analysis per employee on those markers.
+"""
+import math
+import re
+
+from performance_tracker.ai import estimate_tokens
+
+DEFAULT_TOKEN_BUDGET = 1024
+DEFAULT_BATCH_TOKEN_BUDGET = 4096
+# Bounded by the response as much as the prompt: each analysis is a few hundred tokens
+DEFAULT_EMPLOYEES_PER_REQUEST = 8
+COLUMN_LIST_TOKEN_BUDGET = 200
+# Groups and metric means listed in the team context's breakdown by department
+BREAKDOWN_MAX_GROUPS = 10
+BREAKDOWN_MAX_METRICS = 3
+
+# Descriptive columns worth showing the model, most relevant first
+CONTEXT_COLUMNS = ['department', 'role', 'manager_id', 'joining_date', 'name',
+                   'year', 'quarter', 'month', 'period', 'date']
+
+EMPLOYEE_INSTRUCTIONS = """Please provide:
+1. A brief assessment of their performance (2-3 sentences)
+2. 3 specific strengths based on the data
+3. 2-3 improvement areas with actionable suggestions
+4. A performance rating on a scale of 1-10"""
+
+MARKER = "=== EMPLOYEE {} ==="
+_MARKER_PATTERN = re.compile(r"^[ \t#*]*=+\s*EMPLOYEE\s+(.+?)\s*=+[ \t*]*$", re.MULTILINE)
+
+
+def format_value(value):
+    """
+    Short text form of a field value
+    """
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "n/a"
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else f"{value:.2f}".rstrip('0').rstrip('.')
+    return str(value)
+
+
+def employee_fields(columns, metrics, metric_groups=None, id_col=None):
+    """
+    Columns to send for an employee, most relevant first
+    """
+    columns = set(columns)
+    fields = [col for col in dict.fromkeys(metrics.values()) if col in columns]
+    fields += [col for col in CONTEXT_COLUMNS if col in columns and col != id_col and col not in fields]
+    for cols in (metric_groups or {}).values():
+        fields += [col for col in cols if col in columns and col not in fields]
+    return fields
+
+
+def team_context(summary, metrics, records, employees=None):
+    """
+    The compact team statistics block shared by every prompt for a dataset
+    """
+    size = f"{records:,} records" + (f" covering {employees:,} employees" if employees else "")
+    lines = [f"Team: {size}", "Metrics (column: mean | median | min-max):"]
+    # A column standing for several metric types is listed once
+    types = {}
+    for metric_type, col in metrics.items():
+        if col in summary.columns:
+            types.setdefault(col, []).append(metric_type)
+    for col, metric_types in types.items():
+        stats = summary.stats(col)
+        lines.append(f"- {', '.join(metric_types)} ({col}): {format_value(round(stats['mean'], 2))} | "
+                     f"{format_value(stats['50%'])} | {format_value(stats['min'])}-{format_value(stats['max'])}")
+    return "\n".join(lines)
+
+
+def breakdown_block(rollup, level, metric_cols, attainment=(), max_groups=BREAKDOWN_MAX_GROUPS,
+                    max_metrics=BREAKDOWN_MAX_METRICS):
+    """
+    The largest groups of a rollup, one line each with their size, metric means and attainment
+    """
+    metric_cols = list(metric_cols)[:max_metrics]
+    columns = ['records'] + (['employees'] if 'employees' in rollup.columns else [])
+    headers = columns + [f"{col} mean" for col in metric_cols] + [name.replace('_', ' ') for name in attainment]
+    lines = [f"By {level} ({' | '.join(headers)}):"]
+    groups = rollup.sort_values('records', ascending=False, kind='stable')
+    for key, row in groups.head(max_groups).iterrows():
+        values = [format_value(row[col]) for col in columns]
+        values += [format_value(round(row[f"{col}_mean"], 2)) for col in metric_cols]
+        values += ["n/a" if math.isnan(row[name]) else f"{row[name]:.0%}" for name in attainment]
+        lines.append(f"- {format_value(key)}: " + " | ".join(values))
+    if len(groups) > max_groups:
+        lines.append(f"- ... and {len(groups) - max_groups} more")
+    return "\n".join(lines)
+
+
+def employee_line(employee_id, record, budget=None):
+    """
+    One line of `field=value` pairs, dropping trailing fields to stay within `budget` tokens
+    """
+    pairs = [f"{col}={format_value(value)}" for col, value in record.items()]
+    line = f"- {employee_id}: " + ", ".join(pairs)
+    while budget is not None and len(pairs) > 1 and estimate_tokens(line) > budget:
+        pairs.pop()
+        line = f"- {employee_id}: " + ", ".join(pairs)
+    return line
+
+
+def column_list(columns, budget=COLUMN_LIST_TOKEN_BUDGET):
+    """
+    Comma-separated column names, cut short on wide datasets
+    """
+    names = []
+    used = 0
+    for col in columns:
+        used += estimate_tokens(str(col)) + 1
+        if used > budget:
+            return ", ".join(names) + f", ... and {len(columns) - len(names)} more"
+        names.append(str(col))
+    return ", ".join(names)
+
+
+def team_prompt(context):
+    return f"""Analyze this team's performance data and provide concise, actionable insights:
+
+{context}
+
+Please provide:
+1. A brief assessment of team performance (3-4 sentences)
+2. Top performance trends
+3. 2-3 team improvement suggestions
+"""
+
+
+def question_prompt(context, columns, question):
+    return f"""Based on this employee performance data, answer the following question:
+
+"{question}"
+
+{context}
+Columns available: {column_list(columns)}
+
+Please provide concrete, data-backed insights and actionable recommendations.
+"""
+
+
+def improvement_prompt(context):
+    return f"""Based on this team's performance data, create a structured improvement plan:
+
+{context}
+
+Please provide:
+1. Top 3 team strengths to leverage
+2. Top 3 improvement areas with specific action items
+3. Key performance indicators to track progress
+4. A 30-60-90 day implementation timeline
+
+Format as a clear, actionable plan.
+"""
+
+
+def employee_line_budget(context, budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Tokens left for the employee's own line in a single-employee prompt
+    """
+    head, tail = _employee_frame(context)
+    return budget - estimate_tokens(head + tail)
+
+
+def employee_prompt(employee_id, record, context, budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Prompt analyzing one employee against the team, within `budget` tokens where possible
+    """
+    head, tail = _employee_frame(context)
+    return head + employee_line(employee_id, record, budget - estimate_tokens(head + tail)) + tail
+
+
+def batch_prompt(lines, context):
+    """
+    Prompt analyzing several employees at once, one marked section per employee
+    """
+    return ("Analyze each of the following employees' performance against their team and provide "
+            f"concise, actionable insights and improvement suggestions.\n\n{context}\n\n"
+            "Employees:\n" + "\n".join(lines) + "\n\n"
+            "Answer for every employee, in the order listed. Start each employee's answer with a line "
+            f"containing exactly {MARKER.format('<employee id>')}, then:\n{EMPLOYEE_INSTRUCTIONS}\n")
+
+
+def pack_employees(lines, context, budget=DEFAULT_BATCH_TOKEN_BUDGET,
+                   max_per_request=DEFAULT_EMPLOYEES_PER_REQUEST):
+    """
+    Group `(employee_id, line)` pairs into batches whose prompts fit `budget` tokens
+    """
+    overhead = estimate_tokens(batch_prompt([], context))
+    batches, current, used = [], [], overhead
+    for employee_id, line in lines:
+        size = estimate_tokens(line) + 1
+        if current and (len(current) >= max_per_request or used + size > budget):
+            batches.append(current)
+            current, used = [], overhead
+        current.append((employee_id, line))
+        used += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def split_batch_response(text, employee_ids):
+    """
+    Map each employee ID to its section of a batched response; missing IDs are left out
+    """
+    wanted = {str(employee_id): employee_id for employee_id in employee_ids}
+    matches = list(_MARKER_PATTERN.finditer(text))
+    sections = {}
+    for i, match in enumerate(matches):
+        employee_id = wanted.get(match.group(1).strip().strip('<>'))
+        if employee_id is None or employee_id in sections:
+            continue
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        section = text[match.end():end].strip()
+        if section:
+            sections[employee_id] = section
+    return sections
+
+
+def _employee_frame(context):
+    head = ("Analyze this employee's performance against their team and provide concise, "
+            f"actionable insights and improvement suggestions.\n\n{context}\n\nEmployee:\n")
+    return head, f"\n\n{EMPLOYEE_INSTRUCTIONS}\n"
@@ -0,0 +1,315 @@
+"""
+Metric rollups by department, manager, role and period, computed once per dataset.
+
+`RollupCube` aggregates the frame a single time for every grouping the
+dashboard and prompts ask for: the whole team, each dimension on its own,
+and each prefix of the department > manager > role drill-down path, all of
+them overall and per period. Each rollup row holds record and employee
+counts, the mean of every metric column (plus its quartiles, outside the
+per-period rollups) and target attainment (for example
+``sales_achieved / sales_target``, summed over the group). Queries slice
+these small tables instead of regrouping the raw rows on every rerun.
+
+Rows are bucketed once into cells of the finest grain (every dimension plus
+the period); each grouping is then a union of cells, so counts and sums roll
+up from the per-cell totals, and quartiles reuse one sort per metric column.
+
+Managers are also rolled up over their whole reporting chain: where manager
+IDs are themselves employees, a manager's rollup covers everyone below them,
+and `chain()` walks from an employee up to the top.
+"""
+import numpy as np
+import pandas as pd
+
+from performance_tracker.summary import QUANTILES
+
+DIMENSIONS = ['department', 'manager_id', 'role']
+# Drill-down order, broadest level first
+DRILL_PATH = ['department', 'manager_id', 'role']
+QUANTILE_LABELS = ('p25', 'median', 'p75')
+# Suffixes of "achieved" columns paired with a `<prefix>_target` column
+ACHIEVED_SUFFIXES = ('_achieved', '_actual')
+PERIOD = '_period'
+
+
+def attainment_pairs(columns):
+    """
+    Map each attainment measure to its `(achieved, target)` columns, e.g. sales_attainment
+    """
+    columns = list(columns)
+    pairs = {}
+    for col in columns:
+        for suffix in ACHIEVED_SUFFIXES:
+            prefix = col[:-len(suffix)]
+            if col.endswith(suffix) and f"{prefix}_target" in columns:
+                pairs[f"{prefix}_attainment"] = (col, f"{prefix}_target")
+    return pairs
+
+
+def group_quantiles(groups, values, ngroups, quantiles=QUANTILES, presorted=False):
+    """
+    Linearly interpolated quantiles of `values` per group code, as a (quantiles, ngroups) array.
+
+    Negative group codes and NaN values are skipped. Pass `presorted=True`
+    when `values` are already in ascending order to skip the value sort.
+    """
+    if not presorted:
+        order = np.argsort(values, kind='stable')
+        groups, values = groups[order], values[order]
+    keep = (groups >= 0) & ~np.isnan(values)
+    groups, values = groups[keep], values[keep]
+    # A stable sort by group keeps each group's values ascending; small codes get a radix sort
+    codes = groups.astype(np.uint16) if ngroups <= np.iinfo(np.uint16).max else groups
+    values = values[np.argsort(codes, kind='stable')]
+
+    counts = np.bincount(groups, minlength=ngroups)
+    present = counts > 0
+    starts = (np.cumsum(counts) - counts)[present]
+    last = starts + counts[present] - 1
+    result = np.full((len(quantiles), ngroups), np.nan)
+    for i, q in enumerate(quantiles):
+        position = starts + q * (counts[present] - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, last)
+        result[i, present] = values[lower] + (values[upper] - values[lower]) * (position - lower)
+    return result
+
+
+class RollupCube:
+    """
+    Precomputed group aggregates with drill-down and manager-chain lookups
+    """
+
+    def __init__(self, df, metrics, id_col=None, periods=None, dimensions=DIMENSIONS):
+        self.id_col = id_col if id_col in df.columns else None
+        self.dimensions = [col for col in dimensions if col in df.columns and col != self.id_col]
+        self.levels = [col for col in DRILL_PATH if col in self.dimensions]
+        self.metric_cols = [col for col in dict.fromkeys(metrics.values())
+                            if col in df.columns and df[col].dtype.kind in 'iuf']
+        self.attainment = {name: pair for name, pair in attainment_pairs(df.columns).items()
+                           if all(df[col].dtype.kind in 'iuf' for col in pair)}
+        self.has_periods = periods is not None
+
+        # Every row falls in one cell of the finest grain
+        keys = pd.DataFrame({col: df[col] for col in self.dimensions}, index=df.index)
+        if self.has_periods:
+            keys[PERIOD] = np.asarray(periods)
+        if len(keys.columns):
+            grouped = keys.groupby(list(keys.columns), observed=True, sort=True, dropna=False)
+            row_cells = grouped.ngroup().to_numpy(dtype=np.int64)
+            cells = grouped.size().index.to_frame(index=False)
+        else:
+            row_cells = np.zeros(len(df), dtype=np.int64)
+            cells = pd.DataFrame(index=range(1))
+        del keys
+
+        values = {col: df[col].to_numpy(dtype=np.float64) for col in self.metric_cols}
+        for name, (achieved, target) in self.attainment.items():
+            # Rows without a target don't count towards attainment
+            targets = df[target].to_numpy(dtype=np.float64)
+            has_target = targets > 0
+            values[f"_{name}_achieved"] = np.where(has_target, df[achieved].to_numpy(dtype=np.float64), np.nan)
+            values[f"_{name}_target"] = np.where(has_target, targets, np.nan)
+        cell_totals = _row_totals(row_cells, len(cells), values)
+
+        pairs = employee_codes = None
+        if self.id_col:
+            employee_codes, employee_ids = pd.factorize(df[self.id_col])
+            self._employee_ids = employee_ids.tolist()
+            # Distinct (cell, employee) pairs, to count the employees of any union of cells
+            distinct = _distinct(row_cells, employee_codes, len(employee_ids))
+            pairs = (distinct // len(employee_ids), distinct % len(employee_ids), len(employee_ids))
+
+        # Each metric column is sorted once, for the quartiles of every grouping
+        sorted_metrics = {}
+        for col in self.metric_cols:
+            order = np.argsort(values[col], kind='stable')
+            sorted_metrics[col] = (order, values[col][order])
+
+        keysets = [()] + [(col,) for col in self.dimensions]
+        keysets += [tuple(self.levels[:depth]) for depth in range(2, len(self.levels) + 1)]
+        self._tables = {}
+        for keys in dict.fromkeys(keysets):
+            self._tables[keys] = self._rollup(keys, cells, cell_totals, pairs, row_cells, sorted_metrics)
+            if self.has_periods:
+                # Quartiles are by far the costliest aggregate; periods get the additive ones
+                self._tables[keys + (PERIOD,)] = self._rollup(keys + (PERIOD,), cells, cell_totals, pairs)
+
+        self._parent = {}
+        self._chain_table = None
+        if self.id_col and 'manager_id' in self.dimensions:
+            self._build_chain(df['manager_id'], employee_codes, values)
+
+    # Queries
+
+    def rollup(self, *dimensions, period=False):
+        """
+        The precomputed rollup by `dimensions` (plus period), indexed by their values
+        """
+        keys = tuple(dimensions) + ((PERIOD,) if period else ())
+        if keys not in self._tables:
+            raise KeyError(f"No rollup precomputed for {keys}")
+        return self._tables[keys]
+
+    def periods(self):
+        """
+        Periods covered by the data, in order
+        """
+        return list(self._tables[(PERIOD,)].index) if self.has_periods else []
+
+    def drill(self, path=(), period=None):
+        """
+        Rollup of the next level below `path`, a list of values along `levels`.
+
+        `drill([])` is the department rollup, `drill(['Sales'])` the managers
+        within Sales, and so on, optionally for one `period`. Returns None past
+        the last level.
+        """
+        path = list(path)
+        if len(path) >= len(self.levels):
+            return None
+        keys = tuple(self.levels[:len(path) + 1])
+        table = self.rollup(*keys, period=period is not None)
+        selected = dict(zip(keys, path))
+        if period is not None:
+            selected[PERIOD] = period
+        if not selected:
+            return table
+        mask = np.ones(len(table), dtype=bool)
+        for level, value in selected.items():
+            mask &= table.index.get_level_values(level) == value
+        return table[mask].droplevel(list(selected))
+
+    def chain(self, employee_id):
+        """
+        Managers above `employee_id`, nearest first
+        """
+        managers = []
+        current = self._parent.get(employee_id)
+        while current is not None and current not in managers and current != employee_id:
+            managers.append(current)
+            current = self._parent.get(current)
+        return managers
+
+    def manager_rollup(self, manager_id):
+        """
+        Aggregates over everyone in `manager_id`'s reporting chain, or None
+        """
+        if self._chain_table is None or manager_id not in self._chain_table.index:
+            return None
+        return self._chain_table.loc[manager_id]
+
+    def direct_reports(self, manager_id):
+        """
+        Employees whose manager is `manager_id`
+        """
+        return [employee_id for employee_id, parent in self._parent.items() if parent == manager_id]
+
+    def summary_columns(self):
+        """
+        The compact set of rollup columns shown on the dashboard
+        """
+        columns = ['records'] + (['employees'] if self.id_col else [])
+        return columns + [f"{col}_mean" for col in self.metric_cols] + list(self.attainment)
+
+    # Construction
+
+    def _rollup(self, keys, cells, cell_totals, pairs=None, row_cells=None, sorted_metrics=None):
+        if keys:
+            grouped = cells.groupby(list(keys), observed=True, sort=True)
+            index = grouped.size().index
+            # Cells with a missing key value belong to no group
+            cell_groups = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+        else:
+            index = None
+            cell_groups = np.zeros(len(cells), dtype=np.int64)
+        ngroups = len(index) if index is not None else 1
+
+        employees = quantiles = None
+        if pairs is not None:
+            pair_cells, pair_employees, employee_count = pairs
+            distinct = _distinct(cell_groups[pair_cells], pair_employees, employee_count)
+            employees = np.bincount(distinct // employee_count, minlength=ngroups)
+        if sorted_metrics:
+            row_groups = cell_groups[row_cells]
+            quantiles = {col: group_quantiles(row_groups[order], sorted_values, ngroups, presorted=True)
+                         for col, (order, sorted_values) in sorted_metrics.items()}
+        return self._table(_sum_totals(cell_groups, ngroups, cell_totals), employees, quantiles, index)
+
+    def _table(self, totals, employees=None, quantiles=None, index=None):
+        columns = {'records': totals['records'].astype(np.int64)}
+        if employees is not None:
+            columns['employees'] = employees
+        for col in self.metric_cols:
+            count = totals[f"{col}_count"]
+            columns[f"{col}_mean"] = totals[col] / np.where(count > 0, count, np.nan)
+        for i, label in enumerate(QUANTILE_LABELS if quantiles is not None else ()):
+            columns.update((f"{col}_{label}", quantiles[col][i]) for col in self.metric_cols)
+        for name in self.attainment:
+            target = totals[f"_{name}_target"]
+            columns[name] = totals[f"_{name}_achieved"] / np.where(target > 0, target, np.nan)
+        return pd.DataFrame(columns, index=index)
+
+    def _build_chain(self, manager_ids, employee_codes, values):
+        # Each employee's latest manager
+        has_employee = employee_codes >= 0
+        managers = pd.Series(manager_ids.to_numpy()[has_employee]).groupby(employee_codes[has_employee]).last()
+        self._parent = {self._employee_ids[code]: manager for code, manager in managers.items()
+                        if not pd.isna(manager)}
+
+        # One (employee, manager) link for every manager above each employee
+        links = [(code, manager) for code, employee_id in enumerate(self._employee_ids)
+                 for manager in self.chain(employee_id)]
+        if len(links) == len(self._parent):
+            # No manager reports to another: each reporting line is just the direct team
+            self._chain_table = self._tables[('manager_id',)]
+            return
+        link_employees = np.array([code for code, _ in links], dtype=np.int64)
+        link_managers, manager_index = pd.factorize(pd.Series([manager for _, manager in links]))
+
+        # Each link carries its employee's totals up to the manager
+        employee_count = len(self._employee_ids)
+        employee_totals = _row_totals(employee_codes, employee_count, values)
+        totals = _sum_totals(link_managers, len(manager_index),
+                             {key: array[link_employees] for key, array in employee_totals.items()})
+        employees = np.bincount(link_managers, minlength=len(manager_index))
+
+        # Rows repeated once for every manager above them, for the quartiles
+        rows_by_employee = np.argsort(np.where(has_employee, employee_codes, employee_count), kind='stable')
+        row_counts = np.bincount(employee_codes[has_employee], minlength=employee_count)
+        row_starts = np.cumsum(row_counts) - row_counts
+        lengths = row_counts[link_employees]
+        offsets = np.repeat(row_starts[link_employees] - (np.cumsum(lengths) - lengths), lengths)
+        rows = rows_by_employee[offsets + np.arange(lengths.sum())]
+        groups = np.repeat(link_managers, lengths)
+        quantiles = {col: group_quantiles(groups, values[col][rows], len(manager_index))
+                     for col in self.metric_cols}
+
+        self._chain_table = self._table(totals, employees, quantiles, pd.Index(manager_index, name='manager_id'))
+
+
+def _row_totals(groups, ngroups, values):
+    # Record counts per group, plus the sum and non-null count of each value array
+    keep = groups >= 0
+    groups = groups[keep]
+    totals = {'records': np.bincount(groups, minlength=ngroups).astype(np.float64)}
+    for key, array in values.items():
+        array = array[keep]
+        present = ~np.isnan(array)
+        totals[key] = np.bincount(groups[present], weights=array[present], minlength=ngroups)
+        totals[f"{key}_count"] = np.bincount(groups[present], minlength=ngroups)
+    return totals
+
+
+def _sum_totals(groups, ngroups, totals):
+    # Roll per-unit totals up into groups; negative codes belong to no group
+    keep = groups >= 0
+    return {key: np.bincount(groups[keep], weights=array[keep], minlength=ngroups)
+            for key, array in totals.items()}
+
+
+def _distinct(groups, codes, code_count):
+    # Distinct (group, code) pairs encoded as `group * code_count + code`, skipping negative ones
+    keep = (groups >= 0) & (codes >= 0)
+    pairs = np.sort(groups[keep] * code_count + codes[keep])
+    return pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))] if len(pairs) else pairs
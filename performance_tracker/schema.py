@@ -0,0 +1,129 @@
+"""
+Schema inference: which columns hold the employee ID and each metric category.
+
+Keyword lists are compiled into one regex per category, and results are
+memoized on a fingerprint of the column names and dtypes, so re-inferring the
+schema of a frame that has already been seen (even a very wide one) is a
+single hash of its header.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+METRIC_KEYWORDS = {
+    'performance': ['performance', 'score', 'rating', 'evaluation', 'assessment', 'review'],
+    'targets': ['target', 'goal', 'objective', 'quota'],
+    'sales': ['sales', 'revenue', 'deals', 'conversion'],
+    'attendance': ['attendance', 'presence', 'absence', 'leave'],
+    'productivity': ['productivity', 'output', 'efficiency', 'tasks', 'completed'],
+    'quality': ['quality', 'errors', 'accuracy', 'defects', 'precision'],
+}
+
+METRIC_PATTERNS = {
+    metric_type: re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+    for metric_type, keywords in METRIC_KEYWORDS.items()
+}
+
+# Number of numeric columns used when no column name matches a category
+FALLBACK_METRIC_COUNT = 6
+
+_MEMO_SIZE = 64
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def schema_fingerprint(df):
+    """
+    Hash of the column names and dtypes of `df`
+    """
+    digest = hashlib.sha1()
+    for col, dtype in zip(df.columns, df.dtypes):
+        digest.update(f"{col}\0{dtype}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def is_numeric_dtype(dtype):
+    # Matches select_dtypes(include=[np.number]): ints, floats and complex, not bools
+    return getattr(dtype, "kind", "O") in "iufc"
+
+
+def infer_metric_columns(df):
+    """
+    Map each metric category to every numeric column whose name matches it, in column order
+    """
+    return _memoized("metric_columns", df, _infer_metric_columns)
+
+
+def extract_performance_metrics(df):
+    """
+    Dynamically extract key performance metrics from the dataframe
+    """
+    return _memoized("metrics", df, _extract_performance_metrics)
+
+
+def clear_memo():
+    """
+    Forget every memoized schema result
+    """
+    with _memo_lock:
+        _memo.clear()
+
+
+def detect_employee_id_column(columns):
+    """
+    Pick the column that most likely identifies employees
+    """
+    for col in columns:
+        if 'id' in col.lower() or 'employee' in col.lower():
+            return col
+    # Use first column as fallback
+    return columns[0] if len(columns) else None
+
+
+def _infer_metric_columns(df):
+    groups = {metric_type: [] for metric_type in METRIC_PATTERNS}
+    for col, dtype in zip(df.columns, df.dtypes):
+        if not is_numeric_dtype(dtype):
+            continue
+        col_lower = str(col).lower()
+        for metric_type, pattern in METRIC_PATTERNS.items():
+            if pattern.search(col_lower):
+                groups[metric_type].append(col)
+    return {metric_type: cols for metric_type, cols in groups.items() if cols}
+
+
+def _extract_performance_metrics(df):
+    # The first matching column represents each category
+    metrics = {metric_type: cols[0] for metric_type, cols in infer_metric_columns(df).items()}
+
+    # If no specific metrics found, use available numeric columns
+    if not metrics:
+        numeric_cols = [col for col, dtype in zip(df.columns, df.dtypes) if is_numeric_dtype(dtype)]
+        metric_types = list(METRIC_KEYWORDS)
+        for i, col in enumerate(numeric_cols[:FALLBACK_METRIC_COUNT]):
+            if i < len(metric_types):
+                metrics[metric_types[i]] = col
+            else:
+                metrics[f'metric_{i+1}'] = col
+
+    return metrics
+
+
+def _memoized(kind, df, compute):
+    key = (kind, schema_fingerprint(df))
+    with _memo_lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return _copy(_memo[key])
+    result = compute(df)
+    with _memo_lock:
+        _memo[key] = result
+        while len(_memo) > _MEMO_SIZE:
+            _memo.popitem(last=False)
+    return _copy(result)
+
+
+def _copy(result):
+    # Callers may modify what they get back; keep the memoized value intact
+    return {key: list(value) if isinstance(value, list) else value for key, value in result.items()}
@@ -0,0 +1,115 @@
+"""
+Descriptive statistics for the metric columns, computed once per dataset.
+
+All metric columns are stacked into one float matrix and reduced column-wise
+in a single vectorized pass. The result backs both the Key Metrics table and
+every prompt that quotes team averages, so they can't drift apart. Appending
+rows merges the new batch into the running moments (Chan et al.) instead of
+rescanning; quantiles are recomputed lazily on the next request.
+"""
+import numpy as np
+import pandas as pd
+
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+class SummaryStats:
+    """
+    Count, mean, std, min, max and quantiles for a set of numeric columns
+    """
+
+    def __init__(self, df, columns):
+        self.columns = [col for col in dict.fromkeys(columns)
+                        if col in df.columns and pd.api.types.is_numeric_dtype(df[col])]
+        self._col_pos = {col: i for i, col in enumerate(self.columns)}
+        self.rows = 0
+        self._count = np.zeros(len(self.columns))
+        self._mean = np.zeros(len(self.columns))
+        self._m2 = np.zeros(len(self.columns))
+        self._min = np.full(len(self.columns), np.nan)
+        self._max = np.full(len(self.columns), np.nan)
+        self._blocks = []
+        self._quantiles = None
+        self.update(df)
+
+    def update(self, df):
+        """
+        Fold newly appended rows into the statistics
+        """
+        values = df[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.rows += len(values)
+        if not len(values):
+            return self
+        self._blocks.append(values)
+        self._quantiles = None
+
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, np.nansum(values, axis=0) / count, 0.0)
+            m2 = np.nansum((values - mean) ** 2, axis=0)
+
+            # Merge the batch moments into the running ones
+            total = self._count + count
+            delta = mean - self._mean
+            self._mean = np.where(total > 0, self._mean + delta * count / total, 0.0)
+            self._m2 = self._m2 + m2 + np.where(total > 0, delta ** 2 * self._count * count / total, 0.0)
+        self._count = total
+
+        present = count > 0
+        batch_min = np.where(present, np.min(np.where(valid, values, np.inf), axis=0), np.nan)
+        batch_max = np.where(present, np.max(np.where(valid, values, -np.inf), axis=0), np.nan)
+        self._min = np.fmin(self._min, batch_min)
+        self._max = np.fmax(self._max, batch_max)
+        return self
+
+    @property
+    def quantiles(self):
+        if self._quantiles is None:
+            if len(self._blocks) > 1:
+                # Collapse appended batches so later recomputations stay cheap
+                self._blocks = [np.concatenate(self._blocks)]
+            if self._blocks and self.columns:
+                with np.errstate(invalid="ignore"):
+                    self._quantiles = np.nanquantile(self._blocks[0], QUANTILES, axis=0)
+            else:
+                self._quantiles = np.full((len(QUANTILES), len(self.columns)), np.nan)
+        return self._quantiles
+
+    def stats(self, col):
+        """
+        Statistics for one column as a dict
+        """
+        i = self._col_pos[col]
+        count = self._count[i]
+        result = {
+            "count": int(count),
+            "mean": self._mean[i] if count else np.nan,
+            "std": np.sqrt(self._m2[i] / (count - 1)) if count > 1 else np.nan,
+            "min": self._min[i],
+        }
+        for q, value in zip(QUANTILES, self.quantiles[:, i]):
+            result[f"{int(q * 100)}%"] = value
+        result["max"] = self._max[i]
+        return result
+
+    def to_frame(self):
+        """
+        All statistics as a DataFrame, one row per column (like describe().T)
+        """
+        return pd.DataFrame([self.stats(col) for col in self.columns], index=self.columns)
+
+    def metrics_table(self, metrics):
+        """
+        The Avg/Min/Max table shown under Key Metrics, one column per metric type
+        """
+        table = pd.DataFrame()
+        for metric_type, col in metrics.items():
+            if col in self._col_pos:
+                stats = self.stats(col)
+                table[metric_type.capitalize()] = [
+                    f"Avg: {stats['mean']:.2f}",
+                    f"Min: {stats['min']:.2f}",
+                    f"Max: {stats['max']:.2f}",
+                ]
+        return table
@@ -0,0 +1,212 @@
+"""
+Table renderers for the Team Performance Table.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+HEADER_STYLE = "text-align: left; padding: 8px; background-color: #f1f1f1; border: 1px solid #ddd;"
+CELL_STYLE = "border: 1px solid #ddd; padding: 8px;"
+
+
+def metric_ranges(df, metric_cols):
+    """
+    Return `{col: (min, max)}` for the numeric metric columns, in one pass
+    """
+    # Several metric categories can map to the same column
+    numeric_cols = [col for col in dict.fromkeys(metric_cols)
+                    if col in df.columns and pd.api.types.is_numeric_dtype(df[col])]
+    if not numeric_cols:
+        return {}
+    bounds = df[numeric_cols].agg(["min", "max"])
+    return {col: (bounds.at["min", col], bounds.at["max", col]) for col in numeric_cols}
+
+
+def render_colored_table(df, metric_cols, start=0, stop=None, ranges=None):
+    """
+    Render rows `start:stop` of `df` as an HTML table with color-coded metrics.
+
+    Colors are relative to `ranges` (see `metric_ranges`), which should be
+    computed over the whole frame so a page is shaded the same way it would
+    be in the full table.
+    """
+    if ranges is None:
+        ranges = metric_ranges(df, metric_cols)
+    page = df.iloc[start:stop]
+
+    header = "".join(f"<th style='{HEADER_STYLE}'>{_escape_text(col)}</th>" for col in df.columns)
+    if page.empty:
+        return f"<table style='width:100%; border-collapse: collapse;'><tr>{header}</tr></table>"
+
+    columns = [_row_prefix(len(page))]
+    for col in df.columns:
+        if col in ranges:
+            columns.append(_metric_cells(page[col], *ranges[col]))
+        else:
+            columns.append(_plain_cells(page[col]))
+    columns.append(np.full(len(page), "</tr>", dtype=object))
+
+    # Row-major flatten of the (rows x cells) grid yields the table body in order
+    body = "".join(np.column_stack(columns).ravel())
+    return (
+        "<table style='width:100%; border-collapse: collapse;'>"
+        f"<tr>{header}</tr>{body}</table>"
+    )
+
+
+def _row_prefix(rows):
+    return np.full(rows, "<tr>", dtype=object)
+
+
+def _cell_text(series):
+    # str() of every value, as the f-string rendering did; astype(str) keeps NaN as a float
+    text = series.astype(object).map(str)
+    return _escape(text).to_numpy(dtype=object)
+
+
+def _plain_cells(series):
+    return f"<td style='{CELL_STYLE}'>" + _cell_text(series) + "</td>"
+
+
+def _metric_cells(series, min_val, max_val):
+    text = _cell_text(series)
+    if not max_val > min_val:
+        return f"<td style='{CELL_STYLE}'>" + text + "</td>"
+
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    ratio = (values - float(min_val)) / (float(max_val) - float(min_val))
+    valid = ~np.isnan(ratio)
+
+    # Green intensity scales with the value; the top fifth is also bolded
+    intensity = np.where(valid, 255 * ratio, 0).astype(np.int64).astype(str).astype(object)
+    shaded = "background-color: rgba(0, " + intensity + ", 0, 0.2);"
+    bold = np.where(valid & (ratio > 0.8), "font-weight: bold;", "").astype(object)
+    styles = np.where(valid, CELL_STYLE + shaded + bold, CELL_STYLE)
+    return "<td style='" + styles + "'>" + text + "</td>"
+
+
+def _escape(series):
+    return (series.str.replace("&", "&amp;", regex=False)
+                  .str.replace("<", "&lt;", regex=False)
+                  .str.replace(">", "&gt;", regex=False))
+
+
+def _escape_text(value):
+    return str(value).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+class TeamTable:
+    """
+    Server-side filtering, sorting and paging over the team dataframe.
+
+    Sort orders are computed once per column and direction and reused, and
+    top-N queries use partial selection, so only the visible page is ever
+    materialized for the browser.
+    """
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        self._orders = {}
+        self._distinct = {}
+        self._filters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def top_n(self, col, n):
+        """
+        The `n` rows with the largest values of `col`, highest first
+        """
+        return self.df.nlargest(n, col)
+
+    def distinct_values(self, col):
+        """
+        Sorted distinct non-missing values of `col`, cached
+        """
+        if col not in self._distinct:
+            series = self.df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                values = series.cat.remove_unused_categories().cat.categories.tolist()
+            else:
+                values = series.dropna().unique().tolist()
+            self._distinct[col] = sorted(values, key=str)
+        return self._distinct[col]
+
+    def sort_order(self, col, ascending=True):
+        """
+        Row positions sorted by `col` (missing values last), cached per column and direction
+        """
+        key = (col, ascending)
+        with self._lock:
+            order = self._orders.get(key)
+        if order is None:
+            order = _sort_key(self.df[col]).sort_values(ascending=ascending, kind='stable',
+                                                        na_position='last').index.to_numpy()
+            with self._lock:
+                self._orders[key] = order
+        return order
+
+    def filter_mask(self, filters=None, search=None, search_cols=()):
+        """
+        Boolean mask for rows whose `filters` columns take one of the given
+        values and whose `search_cols` contain `search` (case-insensitive)
+        """
+        filters = {col: tuple(values) for col, values in (filters or {}).items() if values}
+        key = (tuple(sorted(filters.items())), search or '', tuple(search_cols))
+        with self._lock:
+            if key in self._filters:
+                self._filters.move_to_end(key)
+                return self._filters[key]
+
+        mask = np.ones(len(self.df), dtype=bool)
+        for col, values in filters.items():
+            mask &= self.df[col].isin(values).to_numpy()
+        if search:
+            matches = np.zeros(len(self.df), dtype=bool)
+            for col in search_cols:
+                matches |= _contains(self.df[col], search)
+            mask &= matches
+
+        with self._lock:
+            self._filters[key] = mask
+            while len(self._filters) > 16:
+                self._filters.popitem(last=False)
+        return mask
+
+    def query(self, sort_by=None, ascending=True, mask=None):
+        """
+        Row positions matching `mask`, in display order
+        """
+        if sort_by is not None:
+            positions = self.sort_order(sort_by, ascending)
+            return positions[mask[positions]] if mask is not None else positions
+        if mask is not None:
+            return np.flatnonzero(mask)
+        return np.arange(len(self.df))
+
+    def page(self, positions, page, page_size):
+        """
+        Rows for 1-based `page` of `positions`
+        """
+        start = (page - 1) * page_size
+        return self.df.iloc[positions[start:start + page_size]]
+
+
+def page_count(rows, page_size):
+    return max(1, -(-rows // page_size))
+
+
+def _sort_key(series):
+    # Categoricals sort by code; sort their categories so codes follow the values
+    if isinstance(series.dtype, pd.CategoricalDtype) and not series.cat.ordered:
+        return series.cat.reorder_categories(series.cat.categories.sort_values())
+    return series
+
+
+def _contains(series, text):
+    # Search categories (or distinct values) once instead of every row
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        hits = categories[categories.astype(str).str.contains(text, case=False, regex=False)]
+        return series.isin(hits).to_numpy()
+    return series.astype(str).str.contains(text, case=False, regex=False).to_numpy()